@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+from typing import Optional
+from utils.profiling import PROFILING_TOKEN, profile_store, token_matches
+
+router = APIRouter()
+
+
+def _check_token(token: Optional[str]):
+    # Without a configured token the admin endpoints don't exist
+    if not PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token_matches(token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+@router.get("/profiles")
+async def list_profiles(x_profile_token: Optional[str] = Header(None)):
+    """List stored request profiles, newest first"""
+    _check_token(x_profile_token)
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """Download a profile: pstats for cProfile, collapsed stacks for sampling"""
+    _check_token(x_profile_token)
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return FileResponse(profile["file"], media_type="application/octet-stream",
+                        filename=profile["file"].rsplit("/", 1)[-1])
@@ -1,11 +1,28 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import numpy as np
 import pandas as pd
-from utils.data_loader import load_data
+from utils.compute import offload
+from utils.data_loader import (load_data, get_dataset_snapshot, get_dataset_version,
+                               get_team_index)
+from utils.matchups import get_season_matchups
+from utils.percentiles import SeasonPercentiles, get_season_percentiles
+from utils.comparables import get_comparables_index
+from utils.response_cache import cached_response
+from utils.rules import PROFILE_STRENGTHS, PROFILE_WEAKNESSES
+from utils.serialization import (FastJSONResponse, model_records, nullable, optional_ints,
+                                 records, rounded)
+from utils.team_resolver import get_team_index as get_team_index_for
 
 router = APIRouter()
 
+# Stats a team profile reports percentiles for by default
+KEY_STATS = ['net_efficiency', 'AdjOE', 'AdjDE', 'win_percentage']
+
+# Upper bound on the comparables returned for one team
+MAX_COMPARABLES = 100
+
 
 class TeamComparison(BaseModel):
     team1: str
@@ -15,6 +32,22 @@ class TeamComparison(BaseModel):
     key_differences: Dict[str, Any]
 
 
+class ComparableTeam(BaseModel):
+    team: str
+    year: int
+    conference: str
+    seed: Optional[int]
+    result: Optional[str]
+    distance: float
+
+
+class ComparablesResponse(BaseModel):
+    team: str
+    year: int
+    features: List[str]
+    comparables: List[ComparableTeam]
+
+
 class ConferenceStats(BaseModel):
     conference: str
     avg_efficiency: float
@@ -24,48 +57,46 @@ class ConferenceStats(BaseModel):
 
 
 @router.get("/compare/{team1}/{team2}")
-async def compare_teams(team1: str, team2: str, year: int = 2025):
+@offload
+def compare_teams(team1: str, team2: str, year: int = 2025):
     """Compare two teams head-to-head"""
     try:
-        data = load_data()
-
-        team1_data = data[
-            (data['Team'].str.contains(team1, case=False, na=False)) &
-            (data['Year'] == year)
-        ]
-        team2_data = data[
-            (data['Team'].str.contains(team2, case=False, na=False)) &
-            (data['Year'] == year)
-        ]
+        snapshot = get_dataset_snapshot()
+        index = get_team_index_for(snapshot.frame, snapshot.version)
+        match1 = index.resolve(team1, year)
+        match2 = index.resolve(team2, year)
 
-        if team1_data.empty or team2_data.empty:
+        if match1 is None or match2 is None:
             raise HTTPException(
                 status_code=404, detail="One or both teams not found")
 
-        t1 = team1_data.iloc[0]
-        t2 = team2_data.iloc[0]
+        # Everything below is a lookup into the season's matchup matrices
+        matchups = get_season_matchups(snapshot.frame, snapshot.version, year)
+        i = matchups.index_of(match1.position)
+        j = matchups.index_of(match2.position)
+        t1, t2 = matchups.teams[i], matchups.teams[j]
+        gaps = {column: float(gap[i, j]) for column, gap in matchups.gaps.items()}
 
         # Simple win prediction based on efficiency
-        eff_diff = t1.get('net_efficiency', 0) - t2.get('net_efficiency', 0)
-        win_prob = 0.5 + (eff_diff / 40)  # Normalize efficiency difference
-        win_prob = max(0.1, min(0.9, win_prob))  # Keep between 10-90%
+        eff_diff = gaps['net_efficiency']
+        win_prob = float(matchups.win_prob[i, j])
 
-        winner = t1['Team'] if eff_diff > 0 else t2['Team']
+        winner = t1 if eff_diff > 0 else t2
 
         key_differences = {
             "efficiency_gap": round(eff_diff, 1),
-            "offensive_advantage": t1['Team'] if t1.get('AdjOE', 0) > t2.get('AdjOE', 0) else t2['Team'],
-            "defensive_advantage": t1['Team'] if t1.get('AdjDE', 110) < t2.get('AdjDE', 110) else t2['Team'],
-            "pace_difference": round(t1.get('Adj T.', 67) - t2.get('Adj T.', 67), 1),
-            "experience_edge": t1['Team'] if t1.get('experience_factor', 0) > t2.get('experience_factor', 0) else t2['Team']
+            "offensive_advantage": t1 if gaps['AdjOE'] > 0 else t2,
+            "defensive_advantage": t1 if gaps['AdjDE'] < 0 else t2,
+            "pace_difference": round(gaps['Adj T.'], 1),
+            "experience_edge": t1 if gaps['experience_factor'] > 0 else t2
         }
 
         return TeamComparison(
-            team1=t1['Team'],
-            team2=t2['Team'],
+            team1=t1,
+            team2=t2,
             winner_prediction=winner,
             win_probability=round(win_prob if winner ==
-                                  t1['Team'] else 1-win_prob, 3),
+                                  t1 else 1-win_prob, 3),
             key_differences=key_differences
         )
 
@@ -73,8 +104,46 @@ async def compare_teams(team1: str, team2: str, year: int = 2025):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/matchup-matrix")
+@cached_response(get_dataset_version)
+@offload
+def get_matchup_matrix(year: int = 2025, teams: Optional[List[str]] = Query(None)):
+    """Win probabilities for every pair of teams (or a chosen set of teams)"""
+    try:
+        snapshot = get_dataset_snapshot()
+        matchups = get_season_matchups(snapshot.frame, snapshot.version, year)
+
+        if matchups is None:
+            raise HTTPException(
+                status_code=404, detail=f"No data found for year {year}")
+
+        if teams:
+            index = get_team_index_for(snapshot.frame, snapshot.version)
+            matches = [index.resolve(team, year) for team in teams]
+            missing = [team for team, match in zip(teams, matches) if match is None]
+            if missing:
+                raise HTTPException(
+                    status_code=404, detail=f"Teams not found: {', '.join(missing)}")
+            rows = np.array([matchups.index_of(match.position) for match in matches])
+        else:
+            rows = np.arange(len(matchups.teams))
+
+        return FastJSONResponse({
+            "year": year,
+            "teams": [matchups.teams[i] for i in rows],
+            "win_probability": matchups.win_prob[np.ix_(rows, rows)].round(3).tolist()
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/conferences", response_model=List[ConferenceStats])
-async def get_conference_analysis(year: int = 2025):
+@cached_response(get_dataset_version)
+@offload
+def get_conference_analysis(year: int = 2025):
     """Analyze conference strength"""
     try:
         data = load_data()
@@ -112,31 +181,76 @@ async def get_conference_analysis(year: int = 2025):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _requested_stats(stats: Optional[List[str]], season: SeasonPercentiles) -> List[str]:
+    if not stats:
+        return KEY_STATS
+    if stats == ['all']:
+        return season.stats
+    return stats
+
+
+@router.get("/percentiles")
+@cached_response(get_dataset_version)
+@offload
+def get_percentiles(year: int = 2025, stats: Optional[List[str]] = Query(None)):
+    """Get percentiles of every team in a season (`stats=all` for all columns)"""
+    try:
+        snapshot = get_dataset_snapshot()
+        season = get_season_percentiles(snapshot.frame, snapshot.version, year)
+
+        if season is None:
+            raise HTTPException(
+                status_code=404, detail=f"No data found for year {year}")
+
+        columns = [stat for stat in _requested_stats(stats, season)
+                   if stat in season.ranks.columns]
+        teams = snapshot.frame['Team'].to_numpy()[list(season.index)].tolist()
+        ranks = season.ranks[columns].round(1).to_numpy(dtype=float).tolist()
+
+        return FastJSONResponse({
+            "year": year,
+            "stats": columns,
+            "teams": records({
+                "team": teams,
+                "percentiles": [dict(zip(columns, row)) for row in ranks]
+            })
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/team-profile/{team_name}")
-async def get_team_profile(team_name: str, year: int = 2025):
-    """Get comprehensive team profile"""
+@offload
+def get_team_profile(team_name: str, year: int = 2025,
+                     stats: Optional[List[str]] = Query(None)):
+    """Get comprehensive team profile
+
+    Percentiles cover the key stats by default; pass `stats` to choose
+    others, or `stats=all` for every numeric column.
+    """
     try:
-        data = load_data()
-        team_data = data[
-            (data['Team'].str.contains(team_name, case=False, na=False)) &
-            (data['Year'] == year)
-        ]
+        snapshot = get_dataset_snapshot()
+        match = get_team_index_for(
+            snapshot.frame, snapshot.version).resolve(team_name, year)
 
-        if team_data.empty:
+        if match is None:
             raise HTTPException(status_code=404, detail="Team not found")
 
-        team = team_data.iloc[0]
+        team = snapshot.frame.iloc[match.position]
 
-        # Calculate percentiles for key stats
-        year_data = data[data['Year'] == year]
-        percentiles = {}
-        key_stats = ['net_efficiency', 'AdjOE', 'AdjDE', 'win_percentage']
-
-        for stat in key_stats:
-            if stat in year_data.columns:
-                percentile = (year_data[stat] <=
-                              team.get(stat, 0)).mean() * 100
-                percentiles[stat] = round(percentile, 1)
+        # Percentiles are lookups into the season's precomputed ranks
+        season = get_season_percentiles(snapshot.frame, snapshot.version, year)
+        key_percentiles = {
+            stat: round(value, 1) for stat, value in
+            season.team_percentiles(match.position, KEY_STATS).items()
+        }
+        percentiles = {
+            stat: round(value, 1) for stat, value in
+            season.team_percentiles(match.position, _requested_stats(stats, season)).items()
+        }
 
         profile = {
             "team": team['Team'],
@@ -158,18 +272,12 @@ async def get_team_profile(team_name: str, year: int = 2025):
             }
         }
 
-        # Identify strengths and weaknesses
-        if percentiles.get('AdjOE', 50) > 75:
-            profile["strengths"].append("Elite offense")
-        if percentiles.get('AdjDE', 50) > 75:
-            profile["strengths"].append("Strong defense")
-        if team.get('win_percentage', 0.5) > 0.8:
-            profile["strengths"].append("Consistent wins")
-
-        if percentiles.get('net_efficiency', 50) < 25:
-            profile["weaknesses"].append("Below-average efficiency")
-        if team.get('win_percentage', 0.5) < 0.6:
-            profile["weaknesses"].append("Inconsistent record")
+        # Strengths and weaknesses rate key stats by season percentile
+        rated = {f"{stat}_percentile": value for stat, value in key_percentiles.items()}
+        if 'win_percentage' in team.index:
+            rated['win_percentage'] = team['win_percentage']
+        profile["strengths"] = PROFILE_STRENGTHS.labels(rated)
+        profile["weaknesses"] = PROFILE_WEAKNESSES.labels(rated)
 
         return profile
 
@@ -177,8 +285,56 @@ async def get_team_profile(team_name: str, year: int = 2025):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/comparables/{team_name}", response_model=ComparablesResponse)
+@cached_response(get_dataset_version)
+@offload
+def get_comparables(team_name: str, year: int = 2025, k: int = 10, same_season: bool = False):
+    """Find the most similar team-seasons of other years, with how far they went.
+
+    Similarity is the distance between standardized model features; pass
+    `same_season=true` to also consider the team's own season.
+    """
+    if not 0 < k <= MAX_COMPARABLES:
+        raise HTTPException(
+            status_code=422, detail=f"k must be between 1 and {MAX_COMPARABLES}")
+
+    try:
+        snapshot = get_dataset_snapshot()
+        match = get_team_index_for(
+            snapshot.frame, snapshot.version).resolve(team_name, year)
+
+        if match is None:
+            raise HTTPException(
+                status_code=404, detail=f"Team '{team_name}' not found for year {year}")
+
+        index = get_comparables_index(snapshot.frame, snapshot.version)
+        positions, distances = index.nearest(match.position, k, same_season)
+        teams = snapshot.frame.iloc[positions]
+
+        return FastJSONResponse({
+            "team": match.team,
+            "year": year,
+            "features": index.features,
+            "comparables": model_records(ComparableTeam, {
+                'team': teams['Team'].tolist(),
+                'year': teams['Year'].astype(int).tolist(),
+                'conference': teams['Conf'].tolist(),
+                'seed': optional_ints(teams['Seed']),
+                'result': nullable(teams['Result']),
+                'distance': rounded(distances, 3)
+            })
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/teams")
-async def get_unique_teams():
+@cached_response(get_dataset_version)
+@offload
+def get_unique_teams():
     """Get list of all unique team names from the dataset"""
     try:
         data = load_data()
@@ -186,3 +342,23 @@ async def get_unique_teams():
         return {"teams": sorted(unique_teams)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/teams/search")
+@offload
+def search_teams(q: str, year: Optional[int] = None, limit: int = 10):
+    """Autocomplete team names, best match first"""
+    try:
+        index = get_team_index()
+        matches = index.search(q, year=year, limit=limit)
+        return {
+            "query": q,
+            "results": [{
+                "team": match.team,
+                "match_type": match.match_type,
+                "score": match.score,
+                "years": index.years(match.team)
+            } for match in matches]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
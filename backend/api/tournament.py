@@ -1,11 +1,30 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from typing import List, Optional
-import pandas as pd
-from utils.data_loader import load_data, load_model, prepare_features, get_team_stats
+from typing import Dict, List, Optional
+import numpy as np
+from utils.bracket import ROUNDS, build_bracket, simulate_bracket, tournament_field
+from utils.compute import offload
+from utils.explanations import ModelExplanations, explanation_store
+from utils.predictions import (PREDICTION_COLUMNS, PredictionSnapshot, count_sources,
+                               get_predictions, get_predictions_version)
+from utils.response_cache import cached_response
+from utils.scenarios import curve, evaluate, grid, scenario_features
+from utils.serialization import (FastJSONResponse, model_records, nullable, records,
+                                 rounded)
+from utils.team_resolver import get_team_index
 
 router = APIRouter()
 
+# Upper bound on team-seasons per batch (every team of one season fits)
+MAX_BATCH_SIZE = 1000
+
+# Upper bound on scenarios per what-if request, over all curves
+MAX_SCENARIOS = 10_000
+
+# Upper bound on simulated tournaments per /simulate request, below what
+# the simulator accepts, so one request can't hold the pool for long
+MAX_REQUEST_SIMULATIONS = 500_000
+
 
 class TournamentPrediction(BaseModel):
     team: str
@@ -17,6 +36,107 @@ class TournamentPrediction(BaseModel):
     current_record: str
 
 
+class FeatureContribution(BaseModel):
+    feature: str
+    value: float
+    contribution: float
+
+
+class ModelExplanation(BaseModel):
+    base_value: float
+    probability: float
+    contributions: List[FeatureContribution]
+
+
+class ExplainedTournamentPrediction(TournamentPrediction):
+    # Per prediction column, for the columns a tree model produced; only
+    # present when requested
+    explanations: Optional[Dict[str, ModelExplanation]] = None
+
+
+class TeamExplanation(BaseModel):
+    team: str
+    probability: float
+    contributions: List[FeatureContribution]
+
+
+class SeasonExplanationResponse(BaseModel):
+    year: int
+    model: str
+    base_value: float
+    teams: List[TeamExplanation]
+
+
+class BatchPredictionRequest(BaseModel):
+    teams: List[str] = []
+    year: int = 2025
+    years: Optional[List[int]] = None
+
+
+class BatchPredictionError(BaseModel):
+    team: Optional[str]
+    year: int
+    error: str
+
+
+class BatchPredictionResponse(BaseModel):
+    predictions: List[TournamentPrediction]
+    errors: List[BatchPredictionError]
+
+
+class FeaturePerturbation(BaseModel):
+    feature: str
+    # Explicit changes to the feature, or `steps` evenly spaced ones from
+    # `min` to `max`
+    deltas: Optional[List[float]] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    steps: int = 11
+
+    def values(self) -> List[float]:
+        if self.deltas is not None:
+            return self.deltas
+        return np.linspace(self.min, self.max, self.steps).tolist()
+
+
+class WhatIfRequest(BaseModel):
+    team: str
+    year: int = 2025
+    perturbations: List[FeaturePerturbation]
+    # "separate": one curve per feature; "grid": one curve over every
+    # combination of the features' deltas
+    combine: str = "separate"
+
+
+class WhatIfCurve(BaseModel):
+    features: Dict[str, List[float]]
+    tournament_probability: List[Optional[float]]
+    upset_risk: List[Optional[float]]
+    deep_run_probability: List[Optional[float]]
+
+
+class WhatIfResponse(BaseModel):
+    team: str
+    year: int
+    baseline: Dict[str, Optional[float]]
+    sources: Dict[str, str]
+    curves: List[WhatIfCurve]
+
+
+class TeamSimulation(BaseModel):
+    team: str
+    seed: int
+    region: int
+    round_probabilities: Dict[str, float]
+
+
+class SimulationResult(BaseModel):
+    year: int
+    simulations: int
+    seed: int
+    teams: List[TeamSimulation]
+
+
 class BubbleTeam(BaseModel):
     team: str
     conference: str
@@ -26,105 +146,292 @@ class BubbleTeam(BaseModel):
     record: str
 
 
-@router.get("/predict/{team_name}", response_model=TournamentPrediction)
-async def predict_tournament_chance(team_name: str, year: int = 2025):
-    """Predict tournament chances for a specific team"""
+def _prediction_records(predictions: PredictionSnapshot, positions, years) -> List[dict]:
+    """TournamentPrediction rows for the teams in the given dataset rows"""
+    def take(column):
+        return predictions.array(column)[positions]
+
+    # Materialized from the model, or the rule-based fallback without one
+    probability = take('tournament_probability').astype(float)
+
+    # Determine confidence; key factors are evaluated with the predictions
+    confidence = np.where((probability > 0.8) | (probability < 0.2), "High", "Medium")
+
+    return model_records(TournamentPrediction, {
+        'team': take('Team').tolist(),
+        'year': [int(year) for year in years],
+        'tournament_probability': rounded(probability, 3),
+        'efficiency_score': rounded(take('net_efficiency'), 1),
+        'prediction_confidence': confidence.tolist(),
+        'key_factors': take('key_factors').tolist(),
+        'current_record': take('Rec').astype(str).tolist()
+    })
+
+
+def _contribution_records(explanation: ModelExplanations, rows, top: Optional[int]) -> List[List[dict]]:
+    """FeatureContribution rows per team, largest contributions first"""
+    order = explanation.order[rows, :top]
+    features = np.asarray(explanation.features, dtype=object)[order].tolist()
+    values = rounded(np.take_along_axis(explanation.values[rows], order, axis=1), 4)
+    contributions = rounded(
+        np.take_along_axis(explanation.contributions[rows], order, axis=1), 4)
+    return [model_records(FeatureContribution, {
+        'feature': features[i], 'value': values[i], 'contribution': contributions[i]
+    }) for i in range(len(order))]
+
+
+@router.post("/predict/batch", response_model=BatchPredictionResponse)
+@offload
+def predict_tournament_chances(request: BatchPredictionRequest):
+    """Predict tournament chances for many teams and/or seasons at once"""
+    years = request.years or [request.year]
+    if len(request.teams) * len(years) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Batch too large: at most {MAX_BATCH_SIZE} team-seasons")
+
     try:
-        team_data = get_team_stats(team_name, year)
-        if team_data is None:
+        predictions = get_predictions()
+        count_sources(predictions, 'tournament_probability')
+        data = predictions.frame
+        index = get_team_index(data, predictions.dataset_version)
+
+        # Resolve every (team, year) first, then gather all rows in one take
+        found = []
+        errors = []
+        for year in years:
+            if request.teams:
+                for team_name in request.teams:
+                    match = index.resolve(team_name, year)
+                    if match is None:
+                        errors.append(BatchPredictionError(
+                            team=team_name, year=year,
+                            error=f"Team '{team_name}' not found for year {year}"))
+                    else:
+                        found.append((match.position, year))
+            else:
+                positions = np.flatnonzero(data['Year'].to_numpy() == year)
+                if len(positions) == 0:
+                    errors.append(BatchPredictionError(
+                        team=None, year=year, error=f"No data found for year {year}"))
+                found.extend((position, year) for position in positions)
+
+        return FastJSONResponse({
+            'predictions': _prediction_records(
+                predictions, [position for position, _ in found], [year for _, year in found]),
+            'errors': [error.model_dump() for error in errors]
+        })
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error processing request: {str(e)}")
+
+
+@router.get("/predict/{team_name}", response_model=ExplainedTournamentPrediction,
+            response_model_exclude_unset=True)
+@offload
+def predict_tournament_chance(team_name: str, year: int = 2025, explain: bool = False):
+    """Predict tournament chances for a specific team.
+
+    With `explain`, adds each model's per-feature contributions to its
+    probability (only the TournamentPrediction fields otherwise).
+    """
+    try:
+        predictions = get_predictions()
+        match = get_team_index(predictions.frame, predictions.dataset_version).resolve(
+            team_name, year)
+        if match is None:
             raise HTTPException(
                 status_code=404, detail=f"Team '{team_name}' not found for year {year}")
 
-        # Try to load model, if not available, use rule-based prediction
-        try:
-            model = load_model('tournament_qualification_model.pkl')
-            X = prepare_features(team_data)
-            probability = float(model.predict_proba(X)[0][1])
-        except FileNotFoundError:
-            # Fallback to rule-based prediction
-            efficiency = team_data.get('net_efficiency', 0)
-            readiness = team_data.get('tournament_readiness', 0)
-            probability = min(max((efficiency + 10) / 40 + readiness, 0), 1)
-
-        # Determine confidence and key factors
-        confidence = "High" if probability > 0.8 or probability < 0.2 else "Medium"
-
-        key_factors = []
-        if team_data.get('net_efficiency', 0) > 15:
-            key_factors.append("Strong efficiency metrics")
-        if team_data.get('tournament_readiness', 0) > 0.7:
-            key_factors.append("High tournament readiness")
-        if team_data.get('player_BPM_max', 0) > 10:
-            key_factors.append("Elite player talent")
-        if team_data.get('wins', 0) > 25:
-            key_factors.append("Strong win record")
-        if not key_factors:
-            key_factors.append("Standard performance metrics")
-
-        return TournamentPrediction(
-            team=team_data['Team'],
-            year=year,
-            tournament_probability=round(probability, 3),
-            efficiency_score=round(team_data.get('net_efficiency', 0), 1),
-            prediction_confidence=confidence,
-            key_factors=key_factors,
-            current_record=str(team_data.get('Rec', 'N/A'))
-        )
+        count_sources(predictions, 'tournament_probability')
+        prediction = _prediction_records(predictions, [match.position], [year])[0]
+        if explain:
+            season = explanation_store.get(predictions.frame, predictions.key, year)
+            row = [season.index_of(match.position)]
+            prediction['explanations'] = {
+                column: {'base_value': round(explanation.bias, 4),
+                         'probability': rounded(explanation.probability[row], 4)[0],
+                         'contributions': _contribution_records(explanation, row, None)[0]}
+                for column, explanation in season.models.items() if explanation is not None
+            }
+        return prediction
 
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error processing request: {str(e)}")
 
 
+def _validate_what_if(request: WhatIfRequest) -> None:
+    if request.combine not in ("separate", "grid"):
+        raise HTTPException(status_code=422, detail="combine must be 'separate' or 'grid'")
+    if not request.perturbations:
+        raise HTTPException(status_code=422, detail="No perturbations given")
+    features = [perturbation.feature for perturbation in request.perturbations]
+    if len(set(features)) != len(features):
+        raise HTTPException(status_code=422, detail="Each feature may be perturbed once")
+
+    sizes = []
+    for perturbation in request.perturbations:
+        if perturbation.deltas is None:
+            if perturbation.min is None or perturbation.max is None:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"{perturbation.feature}: give deltas, or min and max")
+            if perturbation.steps < 2:
+                raise HTTPException(
+                    status_code=422, detail=f"{perturbation.feature}: steps must be at least 2")
+            sizes.append(perturbation.steps)
+        elif not perturbation.deltas:
+            raise HTTPException(status_code=422, detail=f"{perturbation.feature}: no deltas")
+        else:
+            sizes.append(len(perturbation.deltas))
+
+    scenarios = int(np.prod(sizes)) if request.combine == "grid" else sum(sizes)
+    if scenarios > MAX_SCENARIOS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Too many scenarios ({scenarios}): at most {MAX_SCENARIOS}")
+
+
+@router.post("/what-if", response_model=WhatIfResponse)
+@offload
+def predict_what_if(request: WhatIfRequest):
+    """Predictions for a team with some of its features changed.
+
+    Every scenario is stacked into one matrix and scored with one call
+    per model.
+    """
+    _validate_what_if(request)
+
+    try:
+        predictions = get_predictions()
+        data = predictions.frame
+        match = get_team_index(data, predictions.dataset_version).resolve(
+            request.team, request.year)
+        if match is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Team '{request.team}' not found for year {request.year}")
+
+        available = scenario_features(data)
+        unknown = [perturbation.feature for perturbation in request.perturbations
+                   if perturbation.feature not in available]
+        if unknown:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown features {unknown}; choose from {available}")
+
+        deltas = {perturbation.feature: perturbation.values()
+                  for perturbation in request.perturbations}
+        if request.combine == "grid":
+            scenarios = [grid(deltas)]
+        else:
+            scenarios = [curve(feature, values) for feature, values in deltas.items()]
+        results = evaluate(data.iloc[match.position], scenarios)
+
+        curves = []
+        for i, scenario in enumerate(scenarios):
+            curves.append({
+                'features': {feature: rounded(values, 6)
+                             for feature, values in scenario.deltas.items()},
+                **{column: nullable(np.round(result['curves'][i], 4))
+                   for column, result in results.items()}
+            })
+
+        return FastJSONResponse({
+            'team': str(data['Team'].iat[match.position]),
+            'year': request.year,
+            'baseline': {column: nullable(np.round([result['baseline']], 4))[0]
+                         for column, result in results.items()},
+            'sources': {column: result['source'] for column, result in results.items()},
+            'curves': curves
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error evaluating scenarios: {str(e)}")
+
+
+@router.get("/explanations", response_model=SeasonExplanationResponse)
+@cached_response(get_predictions_version)
+@offload
+def get_explanations(year: int = 2025, model: str = 'tournament_probability',
+                     top: Optional[int] = None):
+    """Per-feature contributions to one model's probability for every team
+    of a season, most likely teams first; `top` keeps each team's largest
+    contributions only"""
+    if model not in PREDICTION_COLUMNS:
+        raise HTTPException(
+            status_code=422, detail=f"model must be one of {list(PREDICTION_COLUMNS)}")
+    if top is not None and top < 1:
+        raise HTTPException(status_code=422, detail="top must be at least 1")
+
+    try:
+        predictions = get_predictions()
+        season = explanation_store.get(predictions.frame, predictions.key, year)
+        if season is None:
+            raise HTTPException(
+                status_code=404, detail=f"No data found for year {year}")
+
+        explanation = season.models[model]
+        if explanation is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No model to explain for {model}: it comes from rule-based fallbacks")
+
+        rows = np.argsort(-explanation.probability, kind='stable')
+        teams = predictions.array('Team')[season.positions[rows]]
+        return FastJSONResponse({
+            'year': year,
+            'model': model,
+            'base_value': round(explanation.bias, 4),
+            'teams': model_records(TeamExplanation, {
+                'team': teams.tolist(),
+                'probability': rounded(explanation.probability[rows], 4),
+                'contributions': _contribution_records(explanation, rows, top)
+            })
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error explaining predictions: {str(e)}")
+
+
 @router.get("/bubble-teams", response_model=List[BubbleTeam])
-async def get_bubble_teams(year: int = 2025):
+@cached_response(get_predictions_version)
+@offload
+def get_bubble_teams(year: int = 2025):
     """Get teams on the tournament bubble"""
     try:
-        data = load_data()
-        year_data = data[data['Year'] == year].copy()
+        predictions = get_predictions()
+        count_sources(predictions, 'tournament_probability')
+        data = predictions.frame
+        year_data = data[data['Year'] == year]
 
         if year_data.empty:
             raise HTTPException(
                 status_code=404, detail=f"No data found for year {year}")
 
-        # Try to use model, fallback to efficiency-based ranking
-        try:
-            model = load_model('tournament_qualification_model.pkl')
-            X = year_data[['net_efficiency', 'AdjOE', 'AdjDE', 'Barthag',
-                          'tournament_readiness', 'rank_efficiency_gap',
-                           'wins', 'win_percentage', 'talent_boost',
-                           'player_BPM_max', 'player_BPM_mean',
-                           'Adj T.', '3P Rate - 3PR', 'Turnover% - TOR',
-                           'Turnover% - TORD', 'conf_adjustment']].fillna(0)
-            probabilities = model.predict_proba(X)[:, 1]
-        except FileNotFoundError:
-            # Fallback calculation
-            efficiency = year_data['net_efficiency'].fillna(0)
-            readiness = year_data['tournament_readiness'].fillna(0)
-            probabilities = ((efficiency + 10) / 40 + readiness).clip(0, 1)
-
-        year_data['tournament_probability'] = probabilities
-
         # Find bubble teams (probability between 0.3 and 0.7)
         bubble_teams = year_data[
             (year_data['tournament_probability'] >= 0.3) &
             (year_data['tournament_probability'] <= 0.7)
-        ].sort_values('tournament_probability', ascending=False)
-
-        result = []
-        for _, team in bubble_teams.head(20).iterrows():
-            result.append(BubbleTeam(
-                team=team['Team'],
-                conference=team['Conf'],
-                tournament_probability=round(
-                    team['tournament_probability'], 3),
-                efficiency=round(team.get('net_efficiency', 0), 1),
-                wins=int(team.get('wins', 0)) if pd.notna(
-                    team.get('wins')) else 0,
-                record=str(team.get('Rec', 'N/A'))
-            ))
-
-        return result
+        ].sort_values('tournament_probability', ascending=False, kind='stable')
+
+        teams = bubble_teams.head(20)
+        return FastJSONResponse(model_records(BubbleTeam, {
+            'team': teams['Team'].tolist(),
+            'conference': teams['Conf'].tolist(),
+            'tournament_probability': rounded(teams['tournament_probability'], 3),
+            'efficiency': rounded(teams['net_efficiency'], 1),
+            'wins': teams['wins'].fillna(0).astype(int).tolist(),
+            'record': teams['Rec'].astype(str).tolist()
+        }))
 
     except Exception as e:
         raise HTTPException(
@@ -132,27 +439,71 @@ async def get_bubble_teams(year: int = 2025):
 
 
 @router.get("/top-teams")
-async def get_top_teams(year: int = 2025, limit: int = 25):
+@cached_response(get_predictions_version)
+@offload
+def get_top_teams(year: int = 2025, limit: int = 25):
     """Get top tournament candidates"""
     try:
-        data = load_data()
-        year_data = data[data['Year'] == year].copy()
+        data = get_predictions().frame
+        year_data = data[data['Year'] == year]
 
         # Sort by efficiency and tournament readiness
         top_teams = year_data.nlargest(limit, 'net_efficiency')
 
-        result = []
-        for _, team in top_teams.iterrows():
-            result.append({
-                "team": team['Team'],
-                "conference": team['Conf'],
-                "efficiency": round(team.get('net_efficiency', 0), 1),
-                "wins": int(team.get('wins', 0)) if pd.notna(team.get('wins')) else 0,
-                "record": str(team.get('Rec', 'N/A')),
-                "tournament_readiness": round(team.get('tournament_readiness', 0), 3)
-            })
-
-        return {"top_teams": result}
+        return FastJSONResponse({"top_teams": records({
+            "team": top_teams['Team'].tolist(),
+            "conference": top_teams['Conf'].tolist(),
+            "efficiency": rounded(top_teams['net_efficiency'], 1),
+            "wins": top_teams['wins'].fillna(0).astype(int).tolist(),
+            "record": top_teams['Rec'].astype(str).tolist(),
+            "tournament_readiness": rounded(top_teams['tournament_readiness'], 3)
+        })})
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/simulate", response_model=SimulationResult)
+@cached_response(get_predictions_version)
+@offload
+def simulate_tournament(year: int = 2025,
+                        simulations: int = Query(100_000, ge=1, le=MAX_REQUEST_SIMULATIONS),
+                        seed: int = 0):
+    """Simulate the tournament bracket; chances of reaching each round.
+
+    Results are deterministic per seed, so they are cached per (year,
+    simulations, seed) and data version.
+    """
+    try:
+        data = get_predictions().frame
+        year_data = data[data['Year'] == year]
+
+        if year_data.empty:
+            raise HTTPException(
+                status_code=404, detail=f"No data found for year {year}")
+
+        bracket = build_bracket(tournament_field(year_data))
+        probabilities = simulate_bracket(bracket, simulations, seed=seed)
+
+        teams = [TeamSimulation(
+            team=team,
+            seed=int(bracket.seeds[i]),
+            region=int(bracket.regions[i]) + 1,
+            round_probabilities={
+                round_name: round(float(p), 4)
+                for round_name, p in zip(ROUNDS, probabilities[i])
+            }
+        ) for i, team in enumerate(bracket.teams)]
+
+        return SimulationResult(
+            year=year,
+            simulations=simulations,
+            seed=seed,
+            teams=sorted(teams, key=lambda t: -t.round_probabilities['CHAMPS'])
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error simulating tournament: {str(e)}")
@@ -0,0 +1,82 @@
+"""Per-team cost of /predict/batch against the single-team endpoint.
+
+Run from the backend directory (needs httpx for FastAPI's TestClient):
+    python benchmarks/batch_predict.py [--year 2025] [--repeat 5]
+
+Scores one season's tournament field (68 teams) three ways: one GET per
+team, one POST /predict/batch, and, for reference, the raw model cost of
+68 single-row predict_proba calls against one 68-row call.
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+import warnings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    warnings.filterwarnings("ignore")
+    from fastapi.testclient import TestClient
+    from main import app
+    from utils.data_loader import TOURNAMENT_FEATURES, load_data, load_model
+
+    data = load_data()
+    field = data[(data['Year'] == args.year) & (data['made_tournament'] == True)]
+    teams = field['Team'].tolist()
+    print(f"{len(teams)} teams, year {args.year}, median of {args.repeat} runs")
+
+    with TestClient(app) as client, contextlib.redirect_stdout(io.StringIO()):
+        def single():
+            for team in teams:
+                client.get(f"/api/tournament/predict/{team}", params={"year": args.year})
+
+        def batch():
+            client.post("/api/tournament/predict/batch",
+                        json={"teams": teams, "year": args.year})
+
+        batch()  # warm up caches and materialized predictions
+        single_s = best_of(args.repeat, single)
+        batch_s = best_of(args.repeat, batch)
+
+    model = load_model('tournament_qualification_model.pkl')
+    X = field[TOURNAMENT_FEATURES].fillna(0)
+    row_s = best_of(args.repeat, lambda: [model.predict_proba(X.iloc[[i]])
+                                          for i in range(len(X))])
+    matrix_s = best_of(args.repeat, lambda: model.predict_proba(X))
+
+    n = len(teams)
+    rows = [
+        ("GET /predict/{team} x N", single_s),
+        ("POST /predict/batch", batch_s),
+        ("predict_proba, one row x N", row_s),
+        ("predict_proba, one N-row matrix", matrix_s),
+    ]
+    for label, seconds in rows:
+        print(f"{label:34} {seconds * 1000:9.2f} ms total "
+              f"{seconds / n * 1000:8.3f} ms/team")
+    print(f"Batch endpoint is {single_s / batch_s:.1f}x cheaper per team")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Throughput of the Monte Carlo bracket simulator in simulations/second.
+
+Run from the backend directory:
+    python benchmarks/bracket_simulation.py [--year 2025] [--simulations 1000000]
+        [--workers 1 2 4]
+
+Every worker count must produce identical probabilities for the same seed;
+the benchmark checks that as well.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--simulations", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    from utils.bracket import (CHUNK_SIZE, build_bracket, shutdown_pool,
+                               simulate_bracket, tournament_field)
+    from utils.data_loader import load_data
+
+    data = load_data()
+    bracket = build_bracket(tournament_field(data[data['Year'] == args.year]))
+    print(f"{len(bracket.teams)} teams, year {args.year}, "
+          f"{args.simulations:,} simulations")
+
+    reference = None
+    for workers in args.workers:
+        # Start the worker processes outside the timed run
+        simulate_bracket(bracket, CHUNK_SIZE * workers, seed=args.seed, workers=workers)
+        started = time.perf_counter()
+        probabilities = simulate_bracket(bracket, args.simulations,
+                                         seed=args.seed, workers=workers)
+        elapsed = time.perf_counter() - started
+        reproducible = reference is None or np.array_equal(reference, probabilities)
+        reference = probabilities if reference is None else reference
+        print(f"workers={workers:<3} {elapsed:7.2f} s "
+              f"{args.simulations / elapsed:12,.0f} simulations/s "
+              f"{'identical' if reproducible else 'MISMATCH'}")
+    shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
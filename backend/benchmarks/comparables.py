@@ -0,0 +1,76 @@
+"""Query latency of the comparables index by k and dataset size.
+
+Run from the backend directory:
+    python benchmarks/comparables.py [--scales 1 10 100] [--k 1 10 50 100]
+
+Scales the dataset with synthetic seasons (see synthetic_data.py), builds
+the KD-tree index over it, and times nearest-neighbor queries for sampled
+team-seasons, excluding their own season as the endpoint does. A brute
+force scan over all standardized vectors is timed alongside, and must
+find the same neighbors.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def brute_force(index, position, k):
+    distances = np.sqrt(((index.vectors - index.vectors[position]) ** 2).sum(axis=1))
+    distances[index.years == index.years[position]] = np.inf
+    nearest = np.argpartition(distances, k)[:k]
+    return nearest[np.argsort(distances[nearest], kind='stable')]
+
+
+def median_ms(fn, positions):
+    timings = []
+    for position in positions:
+        started = time.perf_counter()
+        fn(position)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    warnings.filterwarnings("ignore")
+    from synthetic_data import DATASET, scale_dataset
+    from utils.comparables import ComparablesIndex
+
+    frame = pd.read_csv(os.path.join("data", DATASET))
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>8} {'build ms':>9} {'k':>4} {'kd-tree ms':>11} {'brute ms':>9}")
+
+    for scale in args.scales:
+        scaled = scale_dataset(frame, scale)
+        started = time.perf_counter()
+        index = ComparablesIndex(scaled, version=f"x{scale}")
+        build_ms = (time.perf_counter() - started) * 1000
+        positions = rng.choice(len(index), size=min(args.queries, len(index)), replace=False)
+
+        for k in args.k:
+            for position in positions[:10]:
+                found, _ = index.nearest(position, k)
+                if not np.array_equal(np.sort(found), np.sort(brute_force(index, position, k))):
+                    sys.exit(f"KD-tree and brute force disagree (rows {len(index)}, k {k})")
+            tree_ms = median_ms(lambda position: index.nearest(position, k), positions)
+            brute_ms = median_ms(lambda position: brute_force(index, position, k), positions)
+            print(f"{len(index):>8} {build_ms:>9.1f} {k:>4} {tree_ms:>11.3f} {brute_ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Compiled tree ensembles against scikit-learn's predict_proba.
+
+Run from the backend directory:
+    python benchmarks/compiled_models.py [--year 2025] [--repeat 20]
+
+For each model, checks the compiled forest (utils/compiled_forest.py)
+against predict_proba on every row of the dataset, where the dataset has
+the model's features, and on probe inputs around every split threshold,
+and checks that its feature contributions add up to its probabilities.
+Then times both engines on one row, one season and the whole dataset.
+Exits 1 when any difference exceeds the registry's tolerance.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import warnings
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def median_time(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    warnings.filterwarnings("ignore")
+    from utils.compiled_forest import compile_forest, max_difference, probe_inputs
+    from utils.data_loader import load_data
+    from utils.model_registry import COMPILE_TOLERANCE, MODEL_NAMES, model_registry
+
+    data = load_data()
+    failed = False
+    print(f"{len(data)} rows, year {args.year}, median of {args.repeat} runs")
+    print(f"{'model':<36} {'rows':>6} {'sklearn ms':>11} {'compiled ms':>12} {'speedup':>8}")
+
+    for model_name in MODEL_NAMES:
+        model = model_registry.get(model_name).model
+        compiled = compile_forest(model)
+        features = compiled.feature_names
+
+        checks = {"probe inputs": probe_inputs(compiled)}
+        missing = [feature for feature in features if feature not in data.columns]
+        if missing:
+            print(f"{model_name}: dataset lacks {', '.join(missing)}; "
+                  "checked on probe inputs only")
+        else:
+            checks["dataset"] = data[features].fillna(0)
+        for name, X in checks.items():
+            difference = max_difference(model, compiled, X)
+            status = "ok" if difference <= COMPILE_TOLERANCE else "FAILED"
+            failed |= difference > COMPILE_TOLERANCE
+            print(f"{model_name}: max |difference| on {name} ({len(X)} rows): "
+                  f"{difference:.3g} {status}")
+
+            bias, contributions = compiled.contributions(X)
+            difference = float(np.abs(bias + contributions.sum(axis=1)
+                                      - compiled.predict_proba(X)).max())
+            status = "ok" if difference <= COMPILE_TOLERANCE else "FAILED"
+            failed |= difference > COMPILE_TOLERANCE
+            print(f"{model_name}: max |bias + contributions - probability| on {name}: "
+                  f"{difference:.3g} {status}")
+
+        if missing:
+            X = checks["probe inputs"]
+            batches = [X.iloc[:1], X]
+        else:
+            X = checks["dataset"]
+            batches = [X.iloc[:1], X[data['Year'] == args.year], X]
+        for rows in batches:
+            sklearn_s = median_time(args.repeat, lambda: model.predict_proba(rows))
+            compiled_s = median_time(args.repeat, lambda: compiled.predict_proba(rows))
+            print(f"{model_name:<36} {len(rows):>6} {sklearn_s * 1000:>11.3f} "
+                  f"{compiled_s * 1000:>12.3f} {sklearn_s / compiled_s:>7.1f}x")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Latency of mixed endpoints under concurrent clients, per compute executor.
+
+Run from the backend directory (needs uvicorn and httpx):
+    python benchmarks/concurrency.py [--executors inline thread process]
+        [--clients 50 100 200] [--requests 5] [--output results.json]
+
+Starts the API with uvicorn once per executor (COMPUTE_EXECUTOR), then has
+each batch of concurrent clients send a mix of heavy and light requests.
+`inline` runs handlers on the event loop as before the compute pool, so it
+is the baseline. Reports p50/p99 latency over all requests and separately
+for /health, which does no pandas work and shows how long the event loop
+stays blocked, plus how many requests were shed (503) or timed out (504).
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MIXED_PATHS = [
+    "/api/tournament/predict/Duke?year={year}",
+    "/api/analytics/team-profile/Houston?year={year}&stats=all",
+    "/api/analytics/compare/Purdue/Gonzaga?year={year}",
+    "/api/tournament/bubble-teams?year={year}",
+    "/api/upsets/cinderella?year={year}",
+    "/api/analytics/conferences?year={year}",
+    "/api/analytics/percentiles?year={year}&stats=all",
+    "/api/tournament/simulate?year={year}&simulations=20000",
+    "/health",
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(executor, port, workers):
+    env = dict(os.environ, COMPUTE_EXECUTOR=executor, SIMULATION_WORKERS="1",
+               PYTHONWARNINGS="ignore")
+    if workers:
+        env["COMPUTE_WORKERS"] = str(workers)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--log-level", "warning", "--timeout-keep-alive", "300"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+async def wait_ready(client, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+async def run_clients(client, paths, clients, requests):
+    latencies = {path: [] for path in paths}
+    statuses = {}
+
+    async def one_client(offset):
+        for i in range(requests):
+            path = paths[(offset + i) % len(paths)]
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies[path].append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_client(offset) for offset in range(clients)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def summarize(latencies):
+    values = np.asarray(latencies) * 1000
+    return {"p50_ms": round(float(np.percentile(values, 50)), 1),
+            "p99_ms": round(float(np.percentile(values, 99)), 1),
+            "requests": len(values)}
+
+
+async def bench_executor(executor, args):
+    import httpx
+
+    port = free_port()
+    server = start_server(executor, port, args.workers)
+    limits = httpx.Limits(max_connections=max(args.clients))
+    paths = [path.format(year=args.year) for path in MIXED_PATHS]
+    results = []
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}",
+                                     limits=limits, timeout=120) as client:
+            await wait_ready(client)
+            # Warm caches so every executor is measured in steady state
+            await run_clients(client, paths, len(paths), 1)
+
+            for clients in args.clients:
+                latencies, statuses, elapsed = await run_clients(
+                    client, paths, clients, args.requests)
+                total = sum(statuses.values())
+                results.append({
+                    "executor": executor,
+                    "clients": clients,
+                    "throughput_rps": round(total / elapsed, 1),
+                    "all": summarize([t for path in paths for t in latencies[path]]),
+                    "health": summarize(latencies["/health"]),
+                    "statuses": {str(code): count for code, count in sorted(statuses.items())}
+                })
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--executors", nargs="+", default=["inline", "thread", "process"])
+    parser.add_argument("--clients", nargs="+", type=int, default=[50, 100, 200])
+    parser.add_argument("--requests", type=int, default=5,
+                        help="requests per client")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="COMPUTE_WORKERS for the server (default: its own)")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'executor':>8} {'clients':>7} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'health p50':>10} {'health p99':>10}  statuses")
+    for executor in args.executors:
+        for row in asyncio.run(bench_executor(executor, args)):
+            results.append(row)
+            print(f"{row['executor']:>8} {row['clients']:>7} {row['throughput_rps']:>7} "
+                  f"{row['all']['p50_ms']:>8} {row['all']['p99_ms']:>8} "
+                  f"{row['health']['p50_ms']:>10} {row['health']['p99_ms']:>10}  "
+                  f"{row['statuses']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare cold-load time and memory of the CSV and Arrow IPC datasets.
+
+Run from the backend directory after ``python convert_data.py``:
+    python benchmarks/dataset_load.py [--repeat 5]
+
+Each measurement runs in a fresh interpreter so that neither the page
+cache of the other format nor a warm allocator skews the numbers.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_PATH = os.path.join("data", "master_dataset_enhanced.csv")
+
+# Loads one dataset and reports wall time and resident memory growth
+_PROBE = r"""
+import json, resource, sys, time
+sys.path.insert(0, '.')
+import pandas as pd
+from utils.columnar import open_dataset
+
+def rss_mb():
+    # (resident, private) - file-backed pages of a memory map are shared
+    with open('/proc/self/statm') as f:
+        _, resident, shared = (int(v) for v in f.read().split()[:3])
+    page = resource.getpagesize() / 1e6
+    return resident * page, (resident - shared) * page
+
+before = rss_mb()
+started = time.perf_counter()
+version, read = open_dataset(sys.argv[1])
+frame = read()
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "seconds": elapsed,
+    "rss_mb": rss_mb()[0] - before[0],
+    "private_mb": rss_mb()[1] - before[1],
+    "rows": len(frame),
+    "columns": len(frame.columns),
+}))
+"""
+
+
+def measure(path, repeat):
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE, path], cwd=BACKEND_DIR,
+            check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output))
+    return {
+        "path": path,
+        "rows": runs[0]["rows"],
+        "columns": runs[0]["columns"],
+        "median_ms": round(statistics.median(r["seconds"] for r in runs) * 1000, 2),
+        "min_ms": round(min(r["seconds"] for r in runs) * 1000, 2),
+        "rss_mb": round(statistics.median(r["rss_mb"] for r in runs), 1),
+        "private_mb": round(statistics.median(r["private_mb"] for r in runs), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from utils.columnar import columnar_path
+
+    arrow_path = columnar_path(CSV_PATH)
+    if not os.path.exists(os.path.join(BACKEND_DIR, arrow_path)):
+        sys.exit(f"{arrow_path} not found, run python convert_data.py first")
+
+    results = [measure(CSV_PATH, args.repeat), measure(arrow_path, args.repeat)]
+    for result in results:
+        print(f"{result['path']:45} {result['median_ms']:8.2f} ms (min "
+              f"{result['min_ms']:.2f})  +{result['rss_mb']:.1f} MB RSS "
+              f"(+{result['private_mb']:.1f} MB private)")
+    speedup = results[0]["median_ms"] / results[1]["median_ms"]
+    print(f"Arrow IPC loads {speedup:.1f}x faster than CSV")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""Benchmark every API endpoint in-process, with regression thresholds.
+
+Run from the backend directory (needs httpx):
+    python benchmarks/endpoints.py [--output results.json]
+        [--baseline previous.json --threshold 0.25] [--data-dir DIR]
+
+Drives each route of the api/ routers through an ASGI client against the
+bundled (or a synthetic, see synthetic_data.py) dataset and the models:
+
+  cold     first request in a fresh process, after startup warm-up, so it
+           pays for the derived caches (predictions, indexes, matrices)
+  warm     p50/p95 latency of sequential requests once caches are built
+  rps      throughput with --concurrency requests in flight
+  peak_mb  peak Python-tracked allocations of one warm request (tracemalloc)
+
+Results are written as JSON. With --baseline, the run fails (exit 1) when
+an endpoint's warm p50 or peak memory grows, or its throughput drops, by
+more than --threshold (a fraction; also BENCH_REGRESSION_THRESHOLD).
+Every /api route must have a sample request below, so new endpoints can't
+slip out of the suite.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Route template -> (method, URL, JSON body) of a representative request
+SAMPLE_REQUESTS = {
+    "/api/tournament/predict/batch": ("POST", "/api/tournament/predict/batch", {"teams": []}),
+    "/api/tournament/predict/{team_name}": ("GET", "/api/tournament/predict/Duke?year={year}", None),
+    "/api/tournament/explanations": (
+        "GET", "/api/tournament/explanations?year={year}&top=5", None),
+    "/api/tournament/bubble-teams": ("GET", "/api/tournament/bubble-teams?year={year}", None),
+    "/api/tournament/top-teams": ("GET", "/api/tournament/top-teams?year={year}", None),
+    "/api/tournament/what-if": ("POST", "/api/tournament/what-if", {
+        "team": "Houston", "year": 2025, "combine": "grid", "perturbations": [
+            {"feature": "AdjDE", "min": -5, "max": 5, "steps": 21},
+            {"feature": "Barthag", "min": -0.05, "max": 0.05, "steps": 11}]}),
+    "/api/tournament/simulate": (
+        "GET", "/api/tournament/simulate?year={year}&simulations=20000", None),
+    "/api/analytics/compare/{team1}/{team2}": (
+        "GET", "/api/analytics/compare/Duke/Houston?year={year}", None),
+    "/api/analytics/matchup-matrix": ("GET", "/api/analytics/matchup-matrix?year={year}", None),
+    "/api/analytics/conferences": ("GET", "/api/analytics/conferences?year={year}", None),
+    "/api/analytics/percentiles": (
+        "GET", "/api/analytics/percentiles?year={year}&stats=all", None),
+    "/api/analytics/team-profile/{team_name}": (
+        "GET", "/api/analytics/team-profile/Houston?year={year}", None),
+    "/api/analytics/comparables/{team_name}": (
+        "GET", "/api/analytics/comparables/Duke?year={year}&k=10", None),
+    "/api/analytics/teams": ("GET", "/api/analytics/teams", None),
+    "/api/analytics/teams/search": ("GET", "/api/analytics/teams/search?q=mich&year={year}", None),
+    "/api/upsets/alerts": ("GET", "/api/upsets/alerts?year={year}", None),
+    "/api/upsets/cinderella": ("GET", "/api/upsets/cinderella?year={year}", None),
+}
+
+COMPARED = {"warm_p50_ms": "higher", "peak_mb": "higher", "rps": "lower"}
+
+# Peak memory of small responses varies by a few hundred KB run to run
+MIN_PEAK_GROWTH_MB = 1.0
+
+
+def _setup(data_dir):
+    if data_dir:
+        os.environ["DATA_DIR"] = os.path.abspath(data_dir)
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    warnings.filterwarnings("ignore")
+
+
+def api_routes(app):
+    # The OpenAPI paths list every route with its router prefix applied
+    return [path for path in app.openapi()["paths"] if path.startswith("/api/")]
+
+
+def _url(route, year):
+    method, url, body = SAMPLE_REQUESTS[route]
+    if isinstance(body, dict) and "teams" in body:
+        body = {**body, "year": year}
+    return method, url.format(year=year), body
+
+
+async def _request(client, method, url, body):
+    response = await client.request(method, url, json=body)
+    if response.status_code != 200:
+        raise RuntimeError(f"{method} {url} -> {response.status_code}: {response.text[:200]}")
+    return response
+
+
+def _client(app):
+    import httpx
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                             base_url="http://bench", timeout=600)
+
+
+async def _cold(route, year):
+    """One request in this (fresh) process; returns seconds"""
+    from main import app
+    async with app.router.lifespan_context(app), _client(app) as client:
+        method, url, body = _url(route, year)
+        started = time.perf_counter()
+        await _request(client, method, url, body)
+        return time.perf_counter() - started
+
+
+async def _warm(routes, year, requests, concurrency):
+    from main import app
+    results = {}
+    async with app.router.lifespan_context(app), _client(app) as client:
+        for route in routes:
+            method, url, body = _url(route, year)
+            await _request(client, method, url, body)
+
+            timings = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                await _request(client, method, url, body)
+                timings.append(time.perf_counter() - started)
+
+            async def worker(count):
+                for _ in range(count):
+                    await _request(client, method, url, body)
+
+            total = max(requests, concurrency)
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(total // concurrency + (i < total % concurrency))
+                                   for i in range(concurrency)))
+            rps = total / (time.perf_counter() - started)
+
+            timings.sort()
+            results[route] = {
+                "method": method,
+                "url": url,
+                "warm_p50_ms": round(statistics.median(timings) * 1000, 3),
+                "warm_p95_ms": round(timings[int(0.95 * (len(timings) - 1))] * 1000, 3),
+                "rps": round(rps, 1),
+            }
+
+        # Memory last: tracemalloc slows everything it traces
+        tracemalloc.start()
+        for route in routes:
+            method, url, body = _url(route, year)
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            await _request(client, method, url, body)
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+            results[route]["peak_mb"] = round(peak / 1e6, 3)
+        tracemalloc.stop()
+    return results
+
+
+def _child(args):
+    """Entry point of the per-endpoint cold-start processes"""
+    _setup(args.data_dir)
+    print(json.dumps(asyncio.run(_cold(args.cold_route, args.year))))
+
+
+def cold_latency(route, args):
+    command = [sys.executable, os.path.abspath(__file__), "--cold-route", route,
+               "--year", str(args.year)]
+    if args.data_dir:
+        command += ["--data-dir", os.path.abspath(args.data_dir)]
+    output = subprocess.run(command, capture_output=True, text=True, check=True,
+                            env=dict(os.environ, PYTHONWARNINGS="ignore")).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def compare(results, baseline, threshold):
+    """Regressions of results against a baseline run, as messages"""
+    regressions = []
+    for route, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(route)
+        if previous is None:
+            continue
+        for metric, worse in COMPARED.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            if metric == "peak_mb" and new - old < MIN_PEAK_GROWTH_MB:
+                continue
+            if (worse == "higher" and change > threshold or
+                    worse == "lower" and -change > threshold / (1 + threshold)):
+                regressions.append(f"{route} {metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=30,
+                        help="sequential requests per endpoint for warm latency")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--data-dir", help="dataset directory (default: data/)")
+    parser.add_argument("--only", nargs="+", help="route templates to run")
+    parser.add_argument("--no-cold", action="store_true",
+                        help="skip the per-endpoint fresh-process cold runs")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float,
+                        default=float(os.environ.get("BENCH_REGRESSION_THRESHOLD", 0.25)))
+    parser.add_argument("--cold-route", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_route:
+        return _child(args)
+
+    _setup(args.data_dir)
+    from main import app
+    from utils.data_loader import get_dataset_snapshot
+
+    routes = api_routes(app)
+    missing = [route for route in routes if route not in SAMPLE_REQUESTS]
+    if missing:
+        sys.exit(f"No sample request for: {', '.join(missing)}")
+    if args.only:
+        routes = [route for route in routes if route in args.only]
+
+    endpoints = asyncio.run(_warm(routes, args.year, args.requests, args.concurrency))
+    if not args.no_cold:
+        for route in routes:
+            endpoints[route]["cold_ms"] = round(cold_latency(route, args) * 1000, 3)
+
+    snapshot = get_dataset_snapshot()
+    results = {
+        "meta": {
+            "created": time.time(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "dataset": snapshot.path,
+            "dataset_version": snapshot.version,
+            "rows": len(snapshot.frame),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+        "endpoints": endpoints,
+    }
+
+    print(f"{len(snapshot.frame)} rows, year {args.year}")
+    print(f"{'endpoint':<42} {'cold ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'req/s':>8} {'peak MB':>8}")
+    for route, row in endpoints.items():
+        print(f"{route:<42} {row.get('cold_ms', float('nan')):>9.1f} {row['warm_p50_ms']:>8.2f} "
+              f"{row['warm_p95_ms']:>8.2f} {row['rps']:>8.1f} {row['peak_mb']:>8.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\nRegressions over {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Per-request overhead of the metrics middleware and stage timers.
+
+Run from the backend directory (needs httpx for FastAPI's TestClient):
+    python benchmarks/metrics_overhead.py [--requests 500] [--repeat 5]
+
+Times the same requests in fresh processes with METRICS_ENABLED on and
+off, alternating, and keeps each side's best round. Cheap endpoints are
+used on purpose, since they make any fixed per-request cost most
+visible. Since end-to-end timings are noisy, it also times the middleware
+around a no-op app and a single stage timer directly.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PATHS = [
+    "/health",
+    "/api/analytics/teams",
+    "/api/analytics/compare/Duke/Houston",
+    "/api/tournament/predict/Duke",
+]
+
+CHILD = """
+import contextlib, io, json, statistics, sys, time, warnings
+warnings.filterwarnings("ignore")
+from fastapi.testclient import TestClient
+from main import app
+
+paths, requests, repeat = json.loads(sys.argv[1])
+results = {}
+with TestClient(app) as client, contextlib.redirect_stdout(io.StringIO()):
+    for path in paths:
+        client.get(path)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.get(path)
+            timings.append((time.perf_counter() - started) / requests)
+        results[path] = statistics.median(timings)
+print(json.dumps(results))
+"""
+
+
+def run(enabled, args):
+    env = dict(os.environ, METRICS_ENABLED="1" if enabled else "0",
+               COMPUTE_EXECUTOR=args.executor)
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, json.dumps([PATHS, args.requests, args.repeat])],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def micro(calls):
+    """Per-call cost of the middleware around a no-op app, and of stage()"""
+    sys.path.insert(0, BACKEND_DIR)
+    from utils.metrics import MetricsMiddleware, stage
+
+    async def app(scope, receive, send):
+        with stage('data_load'):
+            pass
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+
+    async def noop_send(message):
+        pass
+
+    scope = {'type': 'http', 'method': 'GET', 'path': '/health', 'path_params': {}}
+
+    async def drive(asgi):
+        started = time.perf_counter()
+        for _ in range(calls):
+            await asgi(dict(scope), None, noop_send)
+        return (time.perf_counter() - started) / calls
+
+    bare = asyncio.run(drive(app))
+    wrapped = asyncio.run(drive(MetricsMiddleware(app)))
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        with stage('data_load'):
+            pass
+    idle_stage = (time.perf_counter() - started) / calls
+    return wrapped - bare, idle_stage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--executor", default="thread")
+    args = parser.parse_args()
+
+    off, on = {}, {}
+    for _ in range(args.rounds):
+        for enabled, best in ((False, off), (True, on)):
+            for path, seconds in run(enabled, args).items():
+                best[path] = min(best.get(path, seconds), seconds)
+
+    print(f"{'endpoint':<40} {'off us':>8} {'on us':>8} {'overhead':>9}")
+    for path in PATHS:
+        delta = on[path] - off[path]
+        print(f"{path:<40} {off[path] * 1e6:>8.0f} {on[path] * 1e6:>8.0f} "
+              f"{delta * 1e6:>+6.0f} us ({delta / off[path]:+.1%})")
+
+    middleware, idle_stage = micro(100_000)
+    print(f"\nmiddleware + one stage, per request: {middleware * 1e6:.1f} us")
+    print(f"stage() outside a request: {idle_stage * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Column-wise JSON serialization of list responses against per-row models.
+
+Run from the backend directory (needs httpx for FastAPI's TestClient):
+    python benchmarks/serialization.py [--year 2025] [--repeat 20]
+
+For payloads of 25 and 68 teams, one season's teams, and every team-season
+in the dataset, times building the TournamentPrediction rows of
+/predict/batch two ways on the same rows:
+
+  per-row   a pydantic model per iterrows() row, then FastAPI's response
+            validation and encoding (as the endpoints used to)
+  columnar  rows built from the frame's columns, encoded once (orjson)
+
+Both must produce the same bytes. End-to-end /predict/batch times for the
+same team lists are reported alongside.
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+import warnings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def median_time(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    warnings.filterwarnings("ignore")
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fastapi.testclient import TestClient
+    from api.tournament import (BatchPredictionResponse, TournamentPrediction,
+                                _prediction_records)
+    from main import app
+    from utils.predictions import get_predictions
+    from utils.serialization import FastJSONResponse, orjson
+
+    predictions = get_predictions()
+    data = predictions.frame
+    season = data[data['Year'] == args.year].sort_values('net_efficiency', ascending=False)
+    payloads = {
+        "25": season.head(25),
+        "68": season.head(68),
+        "season": season,
+        "all seasons": data,
+    }
+
+    def per_row(rows):
+        predictions = []
+        for _, team in rows.iterrows():
+            probability = float(team['tournament_probability'])
+            predictions.append(TournamentPrediction(
+                team=team['Team'],
+                year=int(team['Year']),
+                tournament_probability=round(probability, 3),
+                efficiency_score=round(team.get('net_efficiency', 0), 1),
+                prediction_confidence="High" if probability > 0.8 or probability < 0.2 else "Medium",
+                key_factors=list(team['key_factors']),
+                current_record=str(team.get('Rec', 'N/A'))
+            ))
+        # FastAPI validates the returned model against the response model
+        response = BatchPredictionResponse.model_validate(
+            BatchPredictionResponse(predictions=predictions, errors=[]).model_dump())
+        return JSONResponse(jsonable_encoder(response)).body
+
+    def columnar(rows):
+        return FastJSONResponse({
+            'predictions': _prediction_records(
+                predictions, data.index.get_indexer(rows.index), rows['Year'].tolist()),
+            'errors': []
+        }).body
+
+    # End-to-end requests for the same teams; every team-season exceeds
+    # the batch size limit
+    requests = {
+        "25": {"teams": payloads["25"]['Team'].tolist(), "year": args.year},
+        "68": {"teams": payloads["68"]['Team'].tolist(), "year": args.year},
+        "season": {"year": args.year},
+    }
+
+    results = []
+    with TestClient(app) as client, contextlib.redirect_stdout(io.StringIO()):
+        for name, rows in payloads.items():
+            if per_row(rows) != columnar(rows):
+                sys.exit(f"Bodies differ for the {name} payload")
+            per_row_s = median_time(max(1, args.repeat // 4), lambda: per_row(rows))
+            columnar_s = median_time(args.repeat, lambda: columnar(rows))
+
+            post_s = float('nan')
+            if name in requests:
+                client.post("/api/tournament/predict/batch", json=requests[name])
+                post_s = median_time(args.repeat, lambda: client.post(
+                    "/api/tournament/predict/batch", json=requests[name]))
+            results.append((name, len(rows), per_row_s, columnar_s, post_s))
+
+    print(f"encoder: {'orjson' if orjson else 'json'}, year {args.year}, "
+          f"median of {args.repeat} runs")
+    print(f"{'payload':<12} {'teams':>6} {'per-row ms':>11} {'columnar ms':>12} "
+          f"{'speedup':>8} {'batch POST ms':>14}")
+    for name, teams, per_row_s, columnar_s, post_s in results:
+        print(f"{name:<12} {teams:>6} {per_row_s * 1000:>11.2f} {columnar_s * 1000:>12.2f} "
+              f"{per_row_s / columnar_s:>7.1f}x {post_s * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
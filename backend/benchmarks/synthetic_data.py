@@ -0,0 +1,105 @@
+"""Scale the master dataset to N times its rows for scaling benchmarks.
+
+Run from the backend directory:
+    python benchmarks/synthetic_data.py --scale 10 [--mode seasons] [--arrow]
+        [--out benchmarks/data/x10]
+
+Writes <out>/master_dataset_enhanced.csv; point the API or the endpoint
+benchmark at it with DATA_DIR=<out> (or --data-dir).
+
+Modes:
+  seasons  Each copy of the data becomes earlier, synthetic seasons (the
+           real seasons stay the latest), so the number of seasons grows
+           and each season keeps its size. Work over the whole dataset
+           (loading, hashing, scoring every season) scales; per-season
+           endpoints don't.
+  teams    Each season gets N times the teams, as renamed copies ("Duke 2").
+           Per-season work scales too, including the matchup matrices,
+           which grow with the square of the season size: keep N small.
+
+Numeric columns get a little multiplicative noise (--noise) so copies
+aren't identical rows.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET = "master_dataset_enhanced.csv"
+
+# Columns copied as-is: identifiers, flags and small integer codes
+UNCHANGED = {'Year', 'Seed', 'Rk_ranking', 'made_tournament'}
+
+
+def _jitter(copy: pd.DataFrame, noise: float, rng: np.random.Generator) -> pd.DataFrame:
+    if noise <= 0:
+        return copy
+    columns = [column for column in copy.select_dtypes('float').columns
+               if column not in UNCHANGED]
+    factors = rng.normal(1.0, noise, size=(len(copy), len(columns)))
+    return copy.assign(**{column: copy[column].to_numpy() * factors[:, i]
+                          for i, column in enumerate(columns)})
+
+
+def scale_dataset(frame: pd.DataFrame, scale: int, mode: str = 'seasons',
+                  noise: float = 0.01, seed: int = 0) -> pd.DataFrame:
+    """Return the dataset with `scale` times its rows (see module docstring)"""
+    if scale < 1:
+        raise ValueError("scale must be at least 1")
+    rng = np.random.default_rng(seed)
+    years = frame['Year'].unique()
+    span = int(years.max() - years.min() + 1)
+
+    copies = [frame]
+    for k in range(1, scale):
+        copy = _jitter(frame, noise, rng)
+        if mode == 'seasons':
+            copy = copy.assign(Year=copy['Year'] - span * k)
+        elif mode == 'teams':
+            copy = copy.assign(Team=copy['Team'] + f" {k + 1}")
+        else:
+            raise ValueError(f"Unknown mode '{mode}'")
+        copies.append(copy)
+
+    scaled = pd.concat(copies, ignore_index=True)
+    if mode == 'teams':
+        # Put each source row next to its copies, so every season stays
+        # contiguous and roughly in ranking order, as in the source
+        scaled = scaled.iloc[np.arange(len(scaled)).reshape(scale, len(frame)).T.ravel()]
+    return scaled.sort_values('Year', kind='stable').reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, required=True)
+    parser.add_argument("--mode", choices=["seasons", "teams"], default="seasons")
+    parser.add_argument("--noise", type=float, default=0.01,
+                        help="relative std. dev. of the noise on numeric columns")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="output directory (default benchmarks/data/x<scale>)")
+    parser.add_argument("--arrow", action="store_true",
+                        help="also write the Arrow IPC copy (needs pyarrow)")
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    out = args.out or os.path.join("benchmarks", "data", f"x{args.scale}")
+
+    frame = pd.read_csv(os.path.join("data", DATASET))
+    scaled = scale_dataset(frame, args.scale, args.mode, args.noise, args.seed)
+    os.makedirs(out, exist_ok=True)
+    csv_path = os.path.join(out, DATASET)
+    scaled.to_csv(csv_path, index=False)
+    print(f"{len(frame)} -> {len(scaled)} rows, "
+          f"{scaled['Year'].nunique()} seasons: {csv_path}")
+
+    if args.arrow:
+        from utils.columnar import convert_csv
+        print(f"Arrow copy: {convert_csv(csv_path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""What-if scenarios scored as one batch against one call per scenario.
+
+Run from the backend directory:
+    python benchmarks/what_if.py [--team Houston] [--year 2025] [--steps 5 20 50]
+
+Builds a grid of AdjDE and Barthag perturbations for the team, scores it
+with utils.scenarios.evaluate, and scores the same scenarios one row at a
+time through every model. Both must agree exactly.
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--team", default="Houston")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--steps", type=int, nargs="+", default=[5, 20, 50])
+    args = parser.parse_args()
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    warnings.filterwarnings("ignore")
+    from utils.predictions import get_predictions, score_rows
+    from utils.scenarios import _scenario_rows, evaluate, grid
+
+    frame = get_predictions().frame
+    match = frame[(frame['Team'] == args.team) & (frame['Year'] == args.year)]
+    if match.empty:
+        sys.exit(f"No data for {args.team} in {args.year}")
+    team = match.iloc[0]
+    print(f"{'scenarios':>9} {'batched ms':>11} {'per row ms':>11} {'speedup':>8}")
+
+    for steps in args.steps:
+        scenarios = [grid({'AdjDE': np.linspace(-5, 5, steps),
+                           'Barthag': np.linspace(-0.05, 0.05, steps)})]
+        started = time.perf_counter()
+        results = evaluate(team, scenarios)
+        batched_s = time.perf_counter() - started
+
+        rows = _scenario_rows(team, scenarios)
+        started = time.perf_counter()
+        single = [score_rows(rows.iloc[[i]]) for i in range(1, len(rows))]
+        single_s = time.perf_counter() - started
+
+        for column, result in results.items():
+            expected = np.array([scores[column][0][0] for scores in single])
+            if not np.array_equal(result['curves'][0], expected, equal_nan=True):
+                sys.exit(f"Batched and per-row {column} disagree ({steps}x{steps} grid)")
+        print(f"{len(rows) - 1:>9} {batched_s * 1000:>11.1f} {single_s * 1000:>11.1f} "
+              f"{single_s / batched_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
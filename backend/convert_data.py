@@ -0,0 +1,38 @@
+"""Convert the CSV datasets to typed, memory-mappable Arrow IPC files.
+
+Usage (from the backend directory):
+    python convert_data.py                 # master dataset + processed files
+    python convert_data.py path/to/a.csv   # specific files
+
+Each ``name.csv`` gets a ``name.arrow`` next to it. The backend picks the
+Arrow file up automatically as long as it is at least as new as the CSV.
+"""
+import glob
+import os
+import sys
+import time
+
+from utils.columnar import columnar_available, convert_csv
+
+DEFAULT_SOURCES = [
+    os.path.join("data", "master_dataset_enhanced.csv"),
+    *sorted(glob.glob(os.path.join("..", "data-collection", "data", "processed", "*.csv"))),
+]
+
+
+def main(paths):
+    if not columnar_available():
+        print("❌ pyarrow is not installed: pip install pyarrow")
+        return 1
+
+    for csv_path in paths or DEFAULT_SOURCES:
+        started = time.perf_counter()
+        out_path = convert_csv(csv_path)
+        elapsed = time.perf_counter() - started
+        print(f"✅ {csv_path} -> {out_path} "
+              f"({os.path.getsize(out_path) / 1e6:.1f} MB, {elapsed:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,13 +1,38 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from api.tournament import router as tournament_router
 from api.analytics import router as analytics_router
 from api.upsets import router as upsets_router
+from api.admin import router as admin_router
+from utils.bracket import shutdown_pool
+from utils.compute import ComputeOverloaded, ComputeTimeout, compute_pool
+from utils.data_loader import get_dataset_snapshot
+from utils.metrics import MetricsMiddleware, render as render_metrics
+from utils.model_registry import model_registry
+from utils.profiling import PROFILING_ENABLED, ProfilingMiddleware
+from utils.response_cache import response_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up data and models so the first requests don't pay for loading
+    try:
+        get_dataset_snapshot()
+    except FileNotFoundError as e:
+        print(f"⚠️  {e}")
+    model_registry.warm_up()
+    yield
+    compute_pool.shutdown()
+    shutdown_pool()
+
 
 app = FastAPI(
     title="Basketball Analytics API",
     description="March Madness Prediction & Team Analytics System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Enable CORS for frontend
@@ -19,6 +44,22 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+
+@app.exception_handler(ComputeOverloaded)
+async def compute_overloaded_handler(request: Request, exc: ComputeOverloaded):
+    # Shed load early instead of queueing requests without bound
+    return JSONResponse(status_code=503, content={"detail": f"Server busy: {exc}"},
+                        headers={"Retry-After": "1"})
+
+
+@app.exception_handler(ComputeTimeout)
+async def compute_timeout_handler(request: Request, exc: ComputeTimeout):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
 
 # Include routers
 app.include_router(tournament_router,
@@ -26,6 +67,8 @@ app.include_router(tournament_router,
 app.include_router(
     analytics_router, prefix="/api/analytics", tags=["analytics"])
 app.include_router(upsets_router, prefix="/api/upsets", tags=["upsets"])
+app.include_router(admin_router, prefix="/admin", tags=["admin"],
+                   include_in_schema=PROFILING_ENABLED)
 
 
 @app.get("/")
@@ -44,7 +87,34 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "data_loaded": True}
+    try:
+        snapshot = get_dataset_snapshot()
+        dataset = {
+            "version": snapshot.version,
+            "rows": len(snapshot.frame),
+            "loaded_at": snapshot.loaded_at
+        }
+    except FileNotFoundError as e:
+        dataset = {"error": str(e)}
+
+    models = model_registry.status()
+    data_loaded = "version" in dataset
+    all_loaded = data_loaded and all(m["loaded"] for m in models.values())
+
+    return {
+        "status": "healthy" if all_loaded else "degraded",
+        "data_loaded": data_loaded,
+        "dataset": dataset,
+        "models": models,
+        "compute": compute_pool.status(),
+        "response_cache": response_cache.status()
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request and stage latency histograms in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     import uvicorn
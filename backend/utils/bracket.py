@@ -0,0 +1,204 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.matchups import win_probability_matrix
+
+REGIONS = 4
+SEED_LINES = 16
+BRACKET_SIZE = REGIONS * SEED_LINES
+
+# Seed lines in first-round bracket order within a region: 1v16, 8v9, ...
+REGION_ORDER = [1, 16, 8, 9, 5, 12, 4, 13, 6, 11, 3, 14, 7, 10, 2, 15]
+
+# Region order in the bracket, so that the S-curve's regions 1 and 4 (and
+# 2 and 3) meet in the Final Four
+REGION_BRACKET_ORDER = [0, 3, 1, 2]
+
+ROUNDS = ['R64', 'R32', 'Sweet Sixteen', 'Elite Eight', 'Final Four', 'Finals', 'CHAMPS']
+
+# Tournaments per worker task; fixed so results don't depend on worker count
+CHUNK_SIZE = 50_000
+MAX_SIMULATIONS = 2_000_000
+
+
+@dataclass(frozen=True)
+class Bracket:
+    """A 68-team (64 + play-ins) field laid out as bracket slots.
+
+    `slots[k]` is the team index in the k-th first-round position, or -1
+    when that position is filled by the winner of play-in game `k`, whose
+    teams are `play_ins[k]`.
+    """
+    teams: List[str]
+    seeds: np.ndarray
+    regions: np.ndarray
+    net_efficiency: np.ndarray
+    slots: np.ndarray
+    play_ins: dict
+
+
+def _seed_lines_valid(seeds: pd.Series) -> bool:
+    if seeds.isna().any():
+        return False
+    # Every line fills its four regions, with at most one play-in per region
+    counts = seeds.astype(int).value_counts()
+    lines = set(range(1, SEED_LINES + 1))
+    return (set(counts.index) == lines and (counts >= REGIONS).all() and
+            (counts <= 2 * REGIONS).all())
+
+
+def _efficiency_seeds(field: pd.DataFrame) -> np.ndarray:
+    """Seed a field by efficiency: four teams per line, the rest on line 16"""
+    rank = field['net_efficiency'].rank(ascending=False, method='first').to_numpy()
+    return np.minimum((rank - 1) // REGIONS + 1, SEED_LINES).astype(int)
+
+
+def build_bracket(field: pd.DataFrame) -> Bracket:
+    """Lay out a tournament field as a bracket.
+
+    Uses the `Seed` column when it forms valid seed lines, otherwise seeds
+    the field by net efficiency. Regions are assigned along the S-curve,
+    and the weakest extra teams on a crowded seed line meet in play-ins.
+    """
+    field = field.reset_index(drop=True)
+    if 'Seed' in field.columns and _seed_lines_valid(field['Seed']):
+        seeds = field['Seed'].astype(int).to_numpy()
+    elif BRACKET_SIZE <= len(field) <= BRACKET_SIZE + REGIONS:
+        seeds = _efficiency_seeds(field)
+    else:
+        raise ValueError(f"Cannot build a bracket from {len(field)} teams, "
+                         f"need {BRACKET_SIZE}-{BRACKET_SIZE + REGIONS}")
+
+    efficiency = field['net_efficiency'].fillna(0).to_numpy(dtype=float)
+    regions = np.full(len(field), -1)
+    slots = np.full(BRACKET_SIZE, -1)
+    play_ins = {}
+
+    for line in range(1, SEED_LINES + 1):
+        # Strongest teams first; S-curve direction alternates per line
+        line_teams = sorted(np.flatnonzero(seeds == line), key=lambda i: (-efficiency[i], i))
+        line_regions = list(range(REGIONS)) if line % 2 else list(range(REGIONS))[::-1]
+        extra = len(line_teams) - REGIONS
+        direct = line_teams[:REGIONS - extra]
+        paired = line_teams[REGIONS - extra:]
+
+        for position, region in enumerate(line_regions):
+            slot = (REGION_BRACKET_ORDER.index(region) * SEED_LINES +
+                    REGION_ORDER.index(line))
+            if position < len(direct):
+                slots[slot] = direct[position]
+                regions[direct[position]] = region
+            else:
+                # Pair the best remaining team with the worst one
+                k = position - len(direct)
+                pair = (paired[k], paired[-(k + 1)])
+                play_ins[slot] = pair
+                regions[list(pair)] = region
+
+    return Bracket(
+        teams=field['Team'].tolist(),
+        seeds=seeds,
+        regions=regions,
+        net_efficiency=efficiency,
+        slots=slots,
+        play_ins=play_ins
+    )
+
+
+def _simulate_chunk(win_prob: np.ndarray, slots: np.ndarray, play_ins: dict,
+                    simulations: int, seed_sequence: np.random.SeedSequence) -> np.ndarray:
+    """Play `simulations` tournaments at once; counts[team, round] reached"""
+    rng = np.random.default_rng(seed_sequence)
+    n_teams = len(win_prob)
+    counts = np.zeros((n_teams, len(ROUNDS)), dtype=np.int64)
+
+    # One row per simulated tournament, one column per bracket position
+    bracket = np.broadcast_to(slots, (simulations, len(slots))).copy()
+    for slot, (a, b) in play_ins.items():
+        a_wins = rng.random(simulations) < win_prob[a, b]
+        bracket[:, slot] = np.where(a_wins, a, b)
+
+    for round_index in range(len(ROUNDS)):
+        counts[:, round_index] = np.bincount(bracket.ravel(), minlength=n_teams)
+        if bracket.shape[1] == 1:
+            break
+        home, away = bracket[:, 0::2], bracket[:, 1::2]
+        home_wins = rng.random(home.shape) < win_prob[home, away]
+        bracket = np.where(home_wins, home, away)
+
+    return counts
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    return int(os.environ.get("SIMULATION_WORKERS", os.cpu_count() or 1))
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def simulate_bracket(bracket: Bracket, simulations: int, seed: int = 0,
+                     workers: Optional[int] = None) -> np.ndarray:
+    """Monte Carlo the bracket; returns P(team reaches round) per team.
+
+    Simulations are split into fixed-size chunks, each with its own child
+    of the seed's SeedSequence, so a given (seed, simulations) always gives
+    the same result no matter how many worker processes run the chunks.
+    """
+    if not 0 < simulations <= MAX_SIMULATIONS:
+        raise ValueError(f"simulations must be between 1 and {MAX_SIMULATIONS}")
+
+    workers = workers or default_workers()
+    win_prob = win_probability_matrix(bracket.net_efficiency)
+    sizes = [CHUNK_SIZE] * (simulations // CHUNK_SIZE)
+    if simulations % CHUNK_SIZE:
+        sizes.append(simulations % CHUNK_SIZE)
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    tasks = [(win_prob, bracket.slots, bracket.play_ins, size, stream)
+             for size, stream in zip(sizes, streams)]
+    # Inside a compute worker process, don't start a pool of our own
+    in_worker = multiprocessing.parent_process() is not None
+    if workers <= 1 or len(tasks) == 1 or in_worker:
+        results = [_simulate_chunk(*task) for task in tasks]
+    else:
+        pool = _get_pool(workers)
+        results = list(pool.map(_simulate_chunk, *zip(*tasks)))
+
+    return np.sum(results, axis=0) / simulations
+
+
+def tournament_field(year_data: pd.DataFrame) -> pd.DataFrame:
+    """The season's tournament teams, or its top 68 teams by efficiency"""
+    field = year_data[year_data['made_tournament'] == True]
+    if len(field) < BRACKET_SIZE:
+        field = year_data.nlargest(BRACKET_SIZE + REGIONS, 'net_efficiency').drop(
+            columns='Seed', errors='ignore')
+    return field
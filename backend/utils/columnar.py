@@ -0,0 +1,129 @@
+import hashlib
+import io
+import os
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # CSV remains the fallback format
+    pa = None
+    ipc = None
+
+COLUMNAR_SUFFIX = ".arrow"
+
+
+def columnar_available() -> bool:
+    """Whether pyarrow is installed, so Arrow IPC files can be used"""
+    return pa is not None
+
+
+def columnar_path(csv_path: str) -> str:
+    """The Arrow IPC file that sits next to a CSV dataset"""
+    return os.path.splitext(csv_path)[0] + COLUMNAR_SUFFIX
+
+
+def schema_for(frame: pd.DataFrame) -> "pa.Schema":
+    """Build the explicit Arrow schema for a dataset frame.
+
+    Every column maps to a fixed type: integers to int64, floats to float64,
+    booleans to bool and anything textual to string.
+    """
+    fields = []
+    for column, dtype in frame.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            arrow_type = pa.bool_()
+        elif pd.api.types.is_integer_dtype(dtype):
+            arrow_type = pa.int64()
+        elif pd.api.types.is_float_dtype(dtype):
+            arrow_type = pa.float64()
+        elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            arrow_type = pa.string()
+        else:
+            raise TypeError(f"Unsupported dtype {dtype} for column '{column}'")
+        fields.append(pa.field(str(column), arrow_type))
+    return pa.schema(fields)
+
+
+def _to_arrow_array(values: pd.Series, arrow_type: "pa.DataType") -> "pa.Array":
+    if pa.types.is_floating(arrow_type):
+        # Keep NaN as a value instead of a null, so the column can be
+        # handed to pandas straight from the memory map without a copy
+        return pa.array(values.to_numpy(dtype=np.float64), type=arrow_type)
+    return pa.array(values, type=arrow_type, from_pandas=True)
+
+
+def write_columnar(frame: pd.DataFrame, path: str) -> str:
+    """Write a frame to an Arrow IPC file with an explicit schema.
+
+    The file is written next to its destination and renamed into place, so a
+    process that has the previous version memory-mapped keeps a valid view.
+    """
+    if not columnar_available():
+        raise ImportError("pyarrow is required to write columnar datasets")
+
+    schema = schema_for(frame)
+    arrays = [_to_arrow_array(frame[field.name], field.type) for field in schema]
+    table = pa.Table.from_arrays(arrays, schema=schema)
+
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with ipc.new_file(sink, schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def convert_csv(csv_path: str, out_path: Optional[str] = None) -> str:
+    """Convert a CSV dataset to its Arrow IPC counterpart"""
+    return write_columnar(pd.read_csv(csv_path), out_path or columnar_path(csv_path))
+
+
+def open_columnar(path: str) -> Tuple[str, Callable[[], pd.DataFrame]]:
+    """Memory-map an Arrow IPC file.
+
+    Returns the content hash and a function that builds the frame. Numeric
+    columns without nulls are exposed to pandas without copying the mapped
+    buffers; only the hash pass touches every page up front.
+    """
+    buffer = pa.memory_map(path, "r").read_buffer()
+    version = hashlib.sha256(memoryview(buffer)).hexdigest()[:16]
+
+    def read() -> pd.DataFrame:
+        table = ipc.open_file(buffer).read_all()
+        return table.to_pandas(split_blocks=True)
+
+    return version, read
+
+
+def open_csv(path: str) -> Tuple[str, Callable[[], pd.DataFrame]]:
+    """Read a CSV file, returning its content hash and a parser for it"""
+    # Hash and parse the same bytes so version and frame always agree
+    with open(path, "rb") as f:
+        raw = f.read()
+    version = hashlib.sha256(raw).hexdigest()[:16]
+    return version, lambda: pd.read_csv(io.BytesIO(raw))
+
+
+def open_dataset(path: str) -> Tuple[str, Callable[[], pd.DataFrame]]:
+    """Open a dataset file of either format by its extension"""
+    if path.endswith(COLUMNAR_SUFFIX):
+        return open_columnar(path)
+    return open_csv(path)
+
+
+def preferred_path(csv_path: str) -> str:
+    """Pick the columnar copy of a CSV dataset when it is usable.
+
+    The Arrow file is used only when pyarrow is installed and the file is at
+    least as new as the CSV; otherwise the CSV is read directly.
+    """
+    arrow_path = columnar_path(csv_path)
+    if not columnar_available() or not os.path.exists(arrow_path):
+        return csv_path
+    if os.path.exists(csv_path) and os.path.getmtime(arrow_path) < os.path.getmtime(csv_path):
+        return csv_path
+    return arrow_path
@@ -0,0 +1,75 @@
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+from utils.data_loader import TOURNAMENT_FEATURES
+from utils.metrics import stage
+
+# Team-seasons are compared on the features prepare_features() feeds the
+# tournament model
+COMPARABLE_FEATURES = TOURNAMENT_FEATURES
+
+
+class ComparablesIndex:
+    """Nearest-neighbor index over every team-season of a dataset version.
+
+    Features are standardized to zero mean and unit variance across all
+    seasons, so each counts equally in the Euclidean distance; missing
+    values are filled with 0 first, as for the model.
+    """
+
+    def __init__(self, frame: pd.DataFrame, version: str,
+                 features: List[str] = COMPARABLE_FEATURES):
+        self.version = version
+        self.features = features
+        values = frame[features].fillna(0).to_numpy(dtype=float)
+        self.mean = values.mean(axis=0)
+        scale = values.std(axis=0)
+        self.scale = np.where(scale > 0, scale, 1.0)
+        self.vectors = (values - self.mean) / self.scale
+        self.years = frame['Year'].to_numpy()
+        self.tree = KDTree(self.vectors)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def nearest(self, position: int, k: int, same_season: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Dataset rows of the k team-seasons closest to the one in `position`,
+        and their distances, closest first.
+
+        The team itself is never included, nor, unless `same_season`, the
+        other teams of its season.
+        """
+        own_year = self.years[position]
+        query = self.vectors[position:position + 1]
+        # Ask for more neighbors until enough remain after the exclusions
+        wanted = k + 1 if same_season else 2 * (k + 1)
+        while True:
+            wanted = min(wanted, len(self))
+            distances, positions = self.tree.query(query, k=wanted)
+            distances, positions = distances[0], positions[0]
+            keep = positions != position
+            if not same_season:
+                keep &= self.years[positions] != own_year
+            if keep.sum() >= k or wanted == len(self):
+                return positions[keep][:k], distances[keep][:k]
+            wanted *= 2
+
+
+_index: Optional[ComparablesIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_comparables_index(frame: pd.DataFrame, version: str) -> ComparablesIndex:
+    """Get the comparables index for a dataset version, building it on first use"""
+    global _index
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _index_lock, stage('comparables_index'):
+        if _index is None or _index.version != version:
+            _index = ComparablesIndex(frame, version)
+        return _index
@@ -0,0 +1,200 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Rows traversed together by CompiledForest.apply
+BLOCK_ROWS = 512
+# Tree levels descended between dropping the entries that reached a leaf
+LEVELS_PER_PASS = 3
+
+
+@dataclass(frozen=True)
+class CompiledForest:
+    """A fitted tree-ensemble classifier flattened into contiguous arrays.
+
+    The nodes of all trees are concatenated: `feature`, `threshold` and
+    `missing_left` describe each split, `children` holds each node's left
+    and right child as absolute node indices (at 2 * node and 2 * node + 1),
+    `leaf` flags the leaves and `value` holds each node's class
+    probabilities. Rows descend all trees together, one level per step.
+
+    predict_proba follows scikit-learn's: inputs are compared as float32
+    against the float64 thresholds, and tree probabilities are averaged.
+    """
+    roots: np.ndarray
+    feature: np.ndarray
+    threshold: np.ndarray
+    missing_left: Optional[np.ndarray]
+    children: np.ndarray
+    leaf: np.ndarray
+    value: np.ndarray
+    classes: np.ndarray
+    n_features: int
+    feature_names: Optional[List[str]]
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def _matrix(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names is not None and list(X.columns) != self.feature_names:
+                X = X[self.feature_names]
+            X = X.to_numpy()
+        # Rounded to float32, as scikit-learn's trees see their input
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+
+    def _step(self, values: np.ndarray, offsets: np.ndarray, nodes: np.ndarray,
+              missing: bool) -> np.ndarray:
+        value = values[offsets + self.feature[nodes]]
+        if missing:
+            go_right = ~(value <= self.threshold[nodes])
+            go_right &= ~(np.isnan(value) & self.missing_left[nodes])
+        else:
+            go_right = value > self.threshold[nodes]
+        return self.children[2 * nodes + go_right]
+
+    def _descend(self, values: np.ndarray, rows: int, n_features: int) -> np.ndarray:
+        # One (row, tree) entry each. Entries that reached a leaf are dropped
+        # every few levels, so shallow paths stop costing work early
+        nodes = np.tile(self.roots, rows)
+        offsets = np.repeat(np.arange(rows) * n_features, self.n_trees)
+        index = np.arange(len(nodes))
+        current = nodes.copy()
+        missing = self.missing_left is not None and bool(np.isnan(values).any())
+        while len(index):
+            for _ in range(LEVELS_PER_PASS):
+                current = self._step(values, offsets, current, missing)
+            nodes[index] = current
+            split = ~self.leaf[current]
+            index, current, offsets = index[split], current[split], offsets[split]
+        return nodes
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node index of every row in every tree, (rows, trees)"""
+        X = self._matrix(X)
+        rows, n_features = X.shape
+        # Row blocks keep the working set small enough to stay in cache
+        leaves = [self._descend(X[start:start + BLOCK_ROWS].ravel(),
+                                min(BLOCK_ROWS, rows - start), n_features)
+                  for start in range(0, rows, BLOCK_ROWS)]
+        return np.concatenate(leaves).reshape(rows, self.n_trees)
+
+    def predict_proba(self, X) -> np.ndarray:
+        # Summed over the leading tree axis, the trees are added in order, as
+        # scikit-learn does, so results match to the bit
+        return self.value[self.apply(X).T].sum(axis=0) / self.n_trees
+
+    def contributions(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """Path-based attribution of predict_proba to the features.
+
+        Each split on a row's path credits its feature with the change in
+        class probabilities from the node to the child taken, averaged
+        over the trees. Returns the bias, the forest's mean root
+        probabilities (classes,), and the contributions (rows, features,
+        classes); per row, bias plus contributions add up to predict_proba.
+        """
+        X = self._matrix(X)
+        rows, n_features = X.shape
+        values = X.ravel()
+        n_classes = self.value.shape[1]
+        contributions = np.zeros((rows * n_features, n_classes))
+        missing = self.missing_left is not None and bool(np.isnan(values).any())
+
+        nodes = np.tile(self.roots, rows)
+        offsets = np.repeat(np.arange(rows) * n_features, self.n_trees)
+        split = ~self.leaf[nodes]
+        nodes, offsets = nodes[split], offsets[split]
+        while len(nodes):
+            children = self._step(values, offsets, nodes, missing)
+            credited = offsets + self.feature[nodes]
+            change = self.value[children] - self.value[nodes]
+            for k in range(n_classes):
+                contributions[:, k] += np.bincount(credited, weights=change[:, k],
+                                                   minlength=len(contributions))
+            split = ~self.leaf[children]
+            nodes, offsets = children[split], offsets[split]
+
+        bias = self.value[self.roots].mean(axis=0)
+        return bias, contributions.reshape(rows, n_features, n_classes) / self.n_trees
+
+
+def compile_forest(model) -> CompiledForest:
+    """Compile a fitted scikit-learn forest classifier (or a single tree).
+
+    Raises ValueError for models it can't represent: regressors and
+    multi-output classifiers.
+    """
+    estimators = getattr(model, 'estimators_', [model])
+    if not hasattr(model, 'classes_') or any(
+            not hasattr(tree, 'tree_') for tree in estimators):
+        raise ValueError(f"Not a tree classifier: {type(model).__name__}")
+    if np.ndim(model.classes_) != 1:
+        raise ValueError("Multi-output classifiers are not supported")
+
+    roots, features, thresholds, missing, children, leaves, values = [], [], [], [], [], [], []
+    offset = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        nodes = np.arange(tree.node_count)
+        leaf = tree.children_left == -1
+
+        left = np.where(leaf, nodes, tree.children_left) + offset
+        right = np.where(leaf, nodes, tree.children_right) + offset
+        features.append(np.where(leaf, 0, tree.feature))
+        thresholds.append(np.where(leaf, np.inf, tree.threshold))
+        children.append(np.stack([left, right], axis=1).ravel())
+        leaves.append(leaf)
+        if hasattr(tree, 'missing_go_to_left'):
+            missing.append(tree.missing_go_to_left.astype(bool))
+
+        # Class probabilities per node, normalized like DecisionTreeClassifier
+        value = tree.value[:, 0, :len(model.classes_)].astype(float)
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+
+        roots.append(offset)
+        offset += tree.node_count
+
+    names = getattr(model, 'feature_names_in_', None)
+    return CompiledForest(
+        roots=np.array(roots, dtype=np.intp),
+        feature=np.concatenate(features).astype(np.intp),
+        threshold=np.concatenate(thresholds).astype(np.float64),
+        missing_left=np.concatenate(missing) if len(missing) == len(estimators) else None,
+        children=np.concatenate(children).astype(np.intp),
+        leaf=np.concatenate(leaves),
+        value=np.ascontiguousarray(np.concatenate(values)),
+        classes=np.asarray(model.classes_),
+        n_features=int(model.n_features_in_),
+        feature_names=[str(name) for name in names] if names is not None else None
+    )
+
+
+def probe_inputs(compiled: CompiledForest, rows: int = 512, seed: int = 0) -> pd.DataFrame:
+    """Inputs that exercise every split of the forest on both sides.
+
+    Each feature takes values at and one float32 step around its split
+    thresholds, where rounding differences to scikit-learn would show.
+    """
+    rng = np.random.default_rng(seed)
+    X = np.zeros((rows, compiled.n_features), dtype=np.float32)
+    splits = ~compiled.leaf
+    for feature in range(compiled.n_features):
+        thresholds = compiled.threshold[splits & (compiled.feature == feature)].astype(np.float32)
+        if len(thresholds) == 0:
+            continue
+        candidates = np.concatenate([thresholds, np.nextafter(thresholds, -np.inf),
+                                     np.nextafter(thresholds, np.inf)])
+        X[:, feature] = rng.choice(candidates, rows)
+    columns = compiled.feature_names or list(range(compiled.n_features))
+    return pd.DataFrame(X, columns=columns)
+
+
+def max_difference(model, compiled: CompiledForest, X) -> float:
+    """Largest absolute difference to the model's predict_proba on X"""
+    return float(np.abs(model.predict_proba(X) - compiled.predict_proba(X)).max(initial=0.0))
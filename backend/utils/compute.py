@@ -0,0 +1,195 @@
+import asyncio
+import contextvars
+import functools
+import importlib
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from utils.metrics import (RequestTimings, current_timings, mark_handler_done,
+                           start_timings, stop_timings)
+from utils.profiling import PROFILING_ENABLED, ProfileRequest, current_profile, run_profiled
+
+EXECUTOR_KINDS = ('thread', 'process', 'inline')
+
+
+class ComputeOverloaded(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+
+
+class ComputeTimeout(Exception):
+    """Raised when a request's compute work takes longer than the timeout"""
+
+
+# Offloaded functions by (module, name), so process workers can look them
+# up after importing the module instead of pickling the function itself
+_tasks: Dict[Tuple[str, str], Callable] = {}
+
+
+def _run_task(key: Tuple[str, str], args: tuple, kwargs: dict,
+              submitted: Optional[float] = None, profile: Optional[ProfileRequest] = None):
+    timings = current_timings()
+    if submitted is not None and timings is not None:
+        timings.add_stage('compute_wait', time.perf_counter() - submitted)
+    if key not in _tasks:
+        importlib.import_module(key[0])
+    if profile is not None:
+        return run_profiled(profile, _tasks[key], *args, **kwargs)
+    return _tasks[key](*args, **kwargs)
+
+
+def _run_task_in_process(key: Tuple[str, str], args: tuple, kwargs: dict, submitted: float,
+                         profile: Optional[ProfileRequest]) -> Tuple[object, RequestTimings]:
+    # Stage timings are sent back with the result, to be recorded in the
+    # parent process that serves /metrics
+    timings = RequestTimings()
+    token = start_timings(timings)
+    try:
+        return _run_task(key, args, kwargs, submitted, profile), timings
+    except HTTPException as e:
+        # Exceptions are rebuilt from their positional args when unpickled,
+        # and handlers raise HTTPException with keywords only
+        raise HTTPException(e.status_code, e.detail, e.headers) from None
+    finally:
+        stop_timings(token)
+
+
+class ComputePool:
+    """Bounded pool that runs blocking pandas/sklearn work off the event loop.
+
+    At most `workers` calls run at once and at most `queue_size` more wait
+    for a worker; beyond that `run` fails fast with ComputeOverloaded rather
+    than piling up requests. A call that exceeds `timeout` seconds fails with
+    ComputeTimeout. Python can't interrupt a running call, so it keeps its
+    slot until it finishes, which keeps the bound honest under overload.
+
+    The `inline` kind runs calls directly on the event loop, as the handlers
+    did before, and is there for comparison and debugging.
+    """
+
+    def __init__(self, kind: str = 'thread', workers: Optional[int] = None,
+                 queue_size: Optional[int] = None, timeout: float = 30.0):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor '{kind}', expected one of {EXECUTOR_KINDS}")
+        self.kind = kind
+        self.workers = workers or max(2, os.cpu_count() or 1)
+        self.queue_size = self.workers * 8 if queue_size is None else queue_size
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ComputePool":
+        workers = os.environ.get("COMPUTE_WORKERS")
+        queue_size = os.environ.get("COMPUTE_QUEUE_SIZE")
+        return cls(
+            kind=os.environ.get("COMPUTE_EXECUTOR", "thread"),
+            workers=int(workers) if workers else None,
+            queue_size=int(queue_size) if queue_size else None,
+            timeout=float(os.environ.get("COMPUTE_TIMEOUT", 30.0))
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == 'process':
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix='compute')
+            return self._executor
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, key: Tuple[str, str], *args, **kwargs):
+        """Run an offloaded function in the pool and wait for its result"""
+        profile = current_profile() if PROFILING_ENABLED else None
+        if self.kind == 'inline':
+            return _run_task(key, args, kwargs, profile=profile)
+
+        executor = self._get_executor()
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise ComputeOverloaded(
+                    f"All {self.workers} workers busy and {self.queue_size} requests queued")
+            self._in_flight += 1
+
+        try:
+            submitted = time.perf_counter()
+            if self.kind == 'process':
+                future = executor.submit(_run_task_in_process, key, args, kwargs,
+                                         submitted, profile)
+            else:
+                # Run in a copy of the request's context, to keep its timings
+                future = executor.submit(contextvars.copy_context().run,
+                                         _run_task, key, args, kwargs, submitted, profile)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            # A call still queued on timeout is cancelled and frees its slot
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timed_out += 1
+            raise ComputeTimeout(f"Request took longer than {self.timeout:g}s") from None
+
+        if self.kind == 'process':
+            result, remote_timings = result
+            timings = current_timings()
+            if timings is not None:
+                timings.merge(remote_timings)
+        return result
+
+    def status(self) -> dict:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "timeout": self.timeout,
+            "in_flight": self._in_flight,
+            "rejected": self._rejected,
+            "timed_out": self._timed_out
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+compute_pool = ComputePool.from_env()
+
+
+def offload(fn: Callable) -> Callable:
+    """Turn a blocking route handler into an async one run in the compute pool.
+
+    The handler keeps its signature, so FastAPI still sees its parameters.
+    """
+    key = (fn.__module__, fn.__name__)
+    _tasks[key] = fn
+
+    @functools.wraps(fn)
+    async def endpoint(*args, **kwargs):
+        result = await compute_pool.run(key, *args, **kwargs)
+        mark_handler_done()
+        return result
+
+    return endpoint
@@ -1,48 +1,169 @@
 import pandas as pd
-import joblib
 import os
-from typing import Optional
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
 import numpy as np
+from utils.columnar import open_dataset, preferred_path
+from utils.metrics import stage
+from utils.model_registry import model_registry
+from utils.team_resolver import TeamIndex, TeamMatch, get_team_index as get_team_index_for
 
+# Features of tournament_qualification_model.pkl
+TOURNAMENT_FEATURES = [
+    'net_efficiency', 'AdjOE', 'AdjDE', 'Barthag',
+    'tournament_readiness', 'rank_efficiency_gap',
+    'wins', 'win_percentage', 'talent_boost',
+    'player_BPM_max', 'player_BPM_mean',
+    'Adj T.', '3P Rate - 3PR', 'Turnover% - TOR',
+    'Turnover% - TORD', 'conf_adjustment'
+]
 
-def load_data(file_name: str = "master_dataset_enhanced.csv") -> pd.DataFrame:
-    """Load the basketball dataset"""
-    data_path = os.path.join("data", file_name)
+# Features of upset_prediction_model.pkl and deep_run_model.pkl
+UPSET_FEATURES = [
+    'seed_efficiency_gap', 'seed_rank_gap', 'net_efficiency',
+    'three_point_reliance', 'pace_factor', 'defensive_intensity',
+    'upset_resistance', 'momentum_indicator', 'tournament_readiness',
+    'AdjOE', 'AdjDE', 'win_percentage'
+]
+
+# Directory of the dataset files; benchmarks point it at scaled copies
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+
+# Frames handed out by load_data() are shallow copies of one shared, cached
+# frame. Copy-on-Write (the default from pandas 3 on) makes any write to such
+# a copy materialize private data instead of mutating the shared cache.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    """A parsed dataset file together with the identity of its content"""
+    frame: pd.DataFrame
+    version: str
+    path: str
+    mtime_ns: int
+    size: int
+    loaded_at: float
+
+
+class DatasetCache:
+    """Process-wide cache that parses each dataset file only once.
+
+    Each lookup costs a single ``os.stat``. The file is re-read only when its
+    mtime or size changed, and re-parsed only when the content hash differs
+    from the cached one. A new snapshot replaces the old one in a single
+    assignment, so concurrent readers see either the old or the new frame.
+    Both CSV and memory-mapped Arrow IPC files are supported.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[str, DatasetSnapshot] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_current(snapshot: Optional[DatasetSnapshot], stat: os.stat_result) -> bool:
+        return (snapshot is not None and
+                snapshot.mtime_ns == stat.st_mtime_ns and
+                snapshot.size == stat.st_size)
+
+    def get(self, path: str) -> DatasetSnapshot:
+        snapshot = self._snapshots.get(path)
+        if self._is_current(snapshot, os.stat(path)):
+            return snapshot
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            stat = os.stat(path)
+            snapshot = self._snapshots.get(path)
+            if self._is_current(snapshot, stat):
+                return snapshot
+
+            version, read = open_dataset(path)
+
+            if snapshot is not None and snapshot.version == version:
+                # File was touched but its content is unchanged
+                snapshot = replace(snapshot, mtime_ns=stat.st_mtime_ns,
+                                   size=stat.st_size)
+            else:
+                snapshot = DatasetSnapshot(
+                    frame=read(),
+                    version=version,
+                    path=path,
+                    mtime_ns=stat.st_mtime_ns,
+                    size=stat.st_size,
+                    loaded_at=time.time()
+                )
+
+            self._snapshots[path] = snapshot
+            return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+
+
+dataset_cache = DatasetCache()
+
+
+def _data_path(file_name: str) -> str:
+    # A fresh Arrow IPC copy of the CSV (see convert_data.py) loads faster
+    data_path = preferred_path(os.path.join(DATA_DIR, file_name))
     if not os.path.exists(data_path):
         raise FileNotFoundError(f"Data file not found: {data_path}")
-    return pd.read_csv(data_path)
+    return data_path
+
+
+def get_dataset_snapshot(file_name: str = "master_dataset_enhanced.csv") -> DatasetSnapshot:
+    """Get the cached snapshot of a dataset, reloading it if the file changed"""
+    with stage('data_load'):
+        return dataset_cache.get(_data_path(file_name))
+
+
+# Compiled models are checked against the data they will score
+model_registry.reference_data = lambda: get_dataset_snapshot().frame
+
+
+def get_dataset_version(file_name: str = "master_dataset_enhanced.csv") -> str:
+    """Get the content version of a dataset, for keying derived caches"""
+    return get_dataset_snapshot(file_name).version
+
+
+def load_data(file_name: str = "master_dataset_enhanced.csv") -> pd.DataFrame:
+    """Load the basketball dataset (a read-only view of the shared cache)"""
+    return get_dataset_snapshot(file_name).frame.copy(deep=False)
 
 
 def load_model(model_name: str):
-    """Load a trained model"""
-    model_path = os.path.join("models", model_name)
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(
-            f"Model not found: {model_path}. Please train the model first.")
-    return joblib.load(model_path)
+    """Load a trained model (served from the in-memory model registry)"""
+    return model_registry.get(model_name).model
 
 
 def prepare_features(team_data: pd.Series) -> np.ndarray:
     """Prepare features for model prediction"""
-    feature_columns = [
-        'net_efficiency', 'AdjOE', 'AdjDE', 'Barthag',
-        'tournament_readiness', 'rank_efficiency_gap',
-        'wins', 'win_percentage', 'talent_boost',
-        'player_BPM_max', 'player_BPM_mean',
-        'Adj T.', '3P Rate - 3PR', 'Turnover% - TOR',
-        'Turnover% - TORD', 'conf_adjustment'
-    ]
-    return team_data[feature_columns].fillna(0).values.reshape(1, -1)
+    with stage('feature_prep'):
+        return team_data[TOURNAMENT_FEATURES].fillna(0).values.reshape(1, -1)
+
+
+def get_team_index() -> TeamIndex:
+    """Get the team-name index for the current dataset version"""
+    snapshot = get_dataset_snapshot()
+    return get_team_index_for(snapshot.frame, snapshot.version)
+
+
+def resolve_team(team_name: str, year: Optional[int] = None) -> Optional[TeamMatch]:
+    """Resolve a user-supplied team name to a team in the dataset"""
+    return get_team_index().resolve(team_name, year)
 
 
 def get_team_stats(team_name: str, year: int = 2025) -> Optional[pd.Series]:
     """Get stats for a specific team and year"""
-    data = load_data()
-    team_data = data[
-        (data['Team'].str.contains(team_name, case=False, na=False)) &
-        (data['Year'] == year)
-    ]
+    snapshot = get_dataset_snapshot()
+    match = get_team_index_for(
+        snapshot.frame, snapshot.version).resolve(team_name, year)
 
-    if team_data.empty:
+    if match is None:
         return None
-    return team_data.iloc[0]
+    return snapshot.frame.iloc[match.position]
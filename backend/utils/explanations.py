@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.compiled_forest import compile_forest
+from utils.metrics import stage
+from utils.model_registry import model_registry
+from utils.predictions import PREDICTION_COLUMNS
+from utils.season_cache import SeasonCache
+
+
+@dataclass(frozen=True)
+class ModelExplanations:
+    """Per-feature contributions to one model's probability, for a season.
+
+    `bias` is the model's average probability over its training data;
+    adding a row's `contributions` gives the row's probability. `order`
+    ranks each row's features by the size of their contribution.
+    """
+    features: List[str]
+    bias: float
+    values: np.ndarray
+    contributions: np.ndarray
+    probability: np.ndarray
+    order: np.ndarray
+
+
+@dataclass(frozen=True)
+class SeasonExplanations:
+    """Explanations of every model's predictions for one season's teams"""
+    year: int
+    positions: np.ndarray
+    models: Dict[str, Optional[ModelExplanations]]
+    index: Dict[int, int]
+
+    def index_of(self, position: int) -> Optional[int]:
+        """Row of the team in the given dataset row"""
+        return self.index.get(position)
+
+
+def explain_model(model_name: str, season: pd.DataFrame, features) -> Optional[ModelExplanations]:
+    """Contributions of the model's features to its positive-class
+    probability, or None without a tree model to explain (the predictions
+    then come from the rule-based fallback)"""
+    try:
+        model = model_registry.get(model_name)
+        X = season[features].fillna(0)
+        compiled = model.compiled if model.compiled is not None else compile_forest(model.model)
+        # Label contributions in the order the forest reads its features
+        if compiled.feature_names is not None:
+            X = X[compiled.feature_names]
+    except (FileNotFoundError, KeyError, ValueError):
+        return None
+
+    bias, contributions = compiled.contributions(X)
+    positive = list(compiled.classes).index(1)
+    contributions = contributions[:, :, positive]
+    return ModelExplanations(
+        features=list(X.columns),
+        bias=float(bias[positive]),
+        values=X.to_numpy(dtype=float),
+        contributions=contributions,
+        probability=bias[positive] + contributions.sum(axis=1),
+        order=np.argsort(-np.abs(contributions), axis=1, kind='stable')
+    )
+
+
+def build_season_explanations(frame: pd.DataFrame, year: int) -> Optional[SeasonExplanations]:
+    positions = np.flatnonzero(frame['Year'].to_numpy() == year)
+    if len(positions) == 0:
+        return None
+
+    season = frame.iloc[positions]
+    with stage('explanations'):
+        models = {column: explain_model(model_name, season, features)
+                  for column, (model_name, features, _) in PREDICTION_COLUMNS.items()}
+    return SeasonExplanations(
+        year=year,
+        positions=positions,
+        models=models,
+        index={int(position): i for i, position in enumerate(positions)}
+    )
+
+
+# Keyed by the predictions' version, which covers the dataset and models
+explanation_store = SeasonCache(build_season_explanations)
@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.season_cache import SeasonCache
+
+# Head-to-head win probability from the net efficiency gap: every point of
+# efficiency is worth 2.5% of win probability, capped to 10-90%
+EFFICIENCY_SCALE = 40
+MIN_WIN_PROBABILITY = 0.1
+MAX_WIN_PROBABILITY = 0.9
+
+
+def win_probability(efficiency_gap):
+    """Probability that a team beats an opponent it out-rates by `efficiency_gap`"""
+    return np.clip(0.5 + np.asarray(efficiency_gap, dtype=float) / EFFICIENCY_SCALE,
+                   MIN_WIN_PROBABILITY, MAX_WIN_PROBABILITY)
+
+
+def win_probability_matrix(net_efficiency) -> np.ndarray:
+    """N x N matrix whose [i, j] entry is the probability that i beats j"""
+    efficiency = np.nan_to_num(np.asarray(net_efficiency, dtype=float))
+    return win_probability(efficiency[:, None] - efficiency[None, :])
+
+
+# Columns whose pairwise differences the compare endpoint reports
+MATCHUP_COLUMNS = ['net_efficiency', 'AdjOE', 'AdjDE', 'Adj T.', 'experience_factor']
+
+
+@dataclass(frozen=True)
+class SeasonMatchups:
+    """Every head-to-head matchup of one season, as N x N matrices"""
+    year: int
+    teams: List[str]
+    positions: np.ndarray
+    win_prob: np.ndarray
+    gaps: Dict[str, np.ndarray]
+    index: Dict[int, int]
+
+    def index_of(self, position: int) -> Optional[int]:
+        """Matrix index of the team in the given dataset row"""
+        return self.index.get(position)
+
+
+def build_season_matchups(frame: pd.DataFrame, year: int) -> Optional[SeasonMatchups]:
+    positions = np.flatnonzero(frame['Year'].to_numpy() == year)
+    if len(positions) == 0:
+        return None
+
+    season = frame.iloc[positions]
+    gaps = {}
+    for column in MATCHUP_COLUMNS:
+        values = season[column].to_numpy(dtype=float)
+        gaps[column] = values[:, None] - values[None, :]
+
+    return SeasonMatchups(
+        year=year,
+        teams=season['Team'].tolist(),
+        positions=positions,
+        win_prob=win_probability(gaps['net_efficiency']),
+        gaps=gaps,
+        index={int(position): i for i, position in enumerate(positions)}
+    )
+
+
+matchup_store = SeasonCache(build_season_matchups)
+
+
+def get_season_matchups(frame: pd.DataFrame, version: str, year: int) -> Optional[SeasonMatchups]:
+    """Get the matchup matrices of a season for a dataset version"""
+    return matchup_store.get(frame, version, year)
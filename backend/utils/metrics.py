@@ -0,0 +1,264 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with labels, in the Prometheus text format"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            yield f'{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}'
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, in the Prometheus text format"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._values: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted((labels, (list(counts), total))
+                            for labels, (counts, total) in self._values.items())
+        for label_values, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield (f'{self.name}_bucket{_format_labels(self.labels, label_values, le)} '
+                       f'{cumulative}')
+            labels = _format_labels(self.labels, label_values)
+            yield f'{self.name}_sum{labels} {total!r}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Time to handle a request, until its response starts',
+    ('method', 'route', 'status'))
+STAGE_SECONDS = Histogram(
+    'request_stage_duration_seconds', 'Time spent in each stage of handling a request',
+    ('route', 'stage'))
+PREDICTION_SOURCE = Counter(
+    'prediction_source_total', 'Predictions served, by model and whether the model '
+    'or its rule-based fallback produced them', ('model', 'source'))
+
+METRICS = [REQUEST_SECONDS, STAGE_SECONDS, PREDICTION_SOURCE]
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+class RequestTimings:
+    """Stage times and counts gathered while handling one request.
+
+    Recorded into the metrics when the request completes, so that work done
+    in a compute worker process can be shipped back and counted as well.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[Tuple[str, str], int] = {}
+        self.handler_done: Optional[float] = None
+
+    def add_stage(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def merge(self, other: "RequestTimings"):
+        for name, seconds in other.stages.items():
+            self.add_stage(name, seconds)
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    def server_timing(self) -> str:
+        return ', '.join(f'{name};dur={seconds * 1000:.2f}'
+                         for name, seconds in self.stages.items())
+
+
+_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    'request_timings', default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _timings.get()
+
+
+def start_timings(timings: RequestTimings) -> contextvars.Token:
+    return _timings.set(timings)
+
+
+def stop_timings(token: contextvars.Token):
+    _timings.reset(token)
+
+
+class stage:
+    """Time a block as a stage of the current request; a no-op outside one.
+
+    A plain class rather than @contextmanager, as it wraps hot paths such
+    as team resolution and a generator costs several times more per use.
+    """
+    __slots__ = ('name', 'timings', 'started')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.timings = _timings.get()
+        if self.timings is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.timings is not None:
+            self.timings.add_stage(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def count_prediction_source(model: str, source: str):
+    """Count a response served from a model ('model') or its fallback"""
+    timings = _timings.get()
+    if timings is None:
+        PREDICTION_SOURCE.inc(model, source)
+    else:
+        timings.counts[(model, source)] = timings.counts.get((model, source), 0) + 1
+
+
+def mark_handler_done():
+    """Note that the route handler returned; what follows is serialization"""
+    timings = _timings.get()
+    if timings is not None:
+        timings.handler_done = time.perf_counter()
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request and its recorded stages.
+
+    Adds a Server-Timing header with the request's stages. Routes are
+    labelled by their path template, so path parameters don't multiply
+    series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = start_timings(timings)
+        started = time.perf_counter()
+        responded = False
+
+        async def send_with_timing(message):
+            nonlocal responded
+            if message['type'] == 'http.response.start':
+                responded = True
+                now = time.perf_counter()
+                if timings.handler_done is not None:
+                    timings.add_stage('serialization', now - timings.handler_done)
+                if timings.stages:
+                    message['headers'] = [*message.get('headers', []), (
+                        b'server-timing', timings.server_timing().encode('latin-1'))]
+                _record(scope, timings, message['status'], now - started)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            stop_timings(token)
+            if not responded:
+                # Unhandled errors are turned into a 500 further out
+                _record(scope, timings, 500, time.perf_counter() - started)
+
+
+def _route_label(scope) -> str:
+    """The matched route's path template, including its router's prefix"""
+    route = scope.get('route')
+    template = getattr(route, 'path_format', None)
+    if template is None:
+        return 'unmatched'
+    # A route of an included router may only know its path below the prefix
+    try:
+        rendered = template.format(**scope.get('path_params', {}))
+    except (KeyError, IndexError):
+        return template
+    path = scope['path']
+    if path.endswith(rendered):
+        return path[:len(path) - len(rendered)] + template
+    return template
+
+
+def _record(scope, timings: RequestTimings, status: int, seconds: float):
+    route = _route_label(scope)
+    REQUEST_SECONDS.observe(seconds, scope['method'], route, str(status))
+    for name, stage_seconds in timings.stages.items():
+        STAGE_SECONDS.observe(stage_seconds, route, name)
+    for (model, source), count in timings.counts.items():
+        PREDICTION_SOURCE.inc(model, source, amount=count)
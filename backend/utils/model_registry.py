@@ -0,0 +1,255 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.compiled_forest import CompiledForest, compile_forest, max_difference, probe_inputs
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAMES = [
+    'tournament_qualification_model.pkl',
+    'upset_prediction_model.pkl',
+    'deep_run_model.pkl',
+]
+
+# 'compiled' serves tree ensembles from flattened NumPy arrays (see
+# utils/compiled_forest.py), 'sklearn' calls the model's own predict_proba
+ENGINES = ('compiled', 'sklearn')
+
+# A compiled model must match predict_proba this closely on probe inputs
+# and on the dataset
+COMPILE_TOLERANCE = 1e-9
+
+# Dataset rows a compiled model is checked on, evenly spaced over the file
+REFERENCE_ROWS = 5000
+
+
+def parse_engines(spec: str) -> Tuple[str, Dict[str, str]]:
+    """Parse MODEL_ENGINE: a default engine and per-model overrides.
+
+    E.g. "compiled,deep_run_model.pkl=sklearn"; models without an entry
+    use the default, which is 'compiled' unless given.
+    """
+    default, overrides = 'compiled', {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        model_name, _, engine = entry.rpartition('=')
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown model engine '{engine}', expected one of {ENGINES}")
+        if model_name:
+            overrides[model_name] = engine
+        else:
+            default = engine
+    return default, overrides
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """A deserialized model plus the metadata describing where it came from"""
+    name: str
+    path: str
+    model: Any
+    version: str
+    features: Optional[List[str]]
+    mtime_ns: int
+    size: int
+    loaded_at: float
+    load_seconds: float
+    compiled: Optional[CompiledForest] = None
+
+    @property
+    def engine(self) -> str:
+        return 'compiled' if self.compiled is not None else 'sklearn'
+
+    def predict_proba(self, X):
+        """Class probabilities from the model's configured engine"""
+        if self.compiled is not None:
+            return self.compiled.predict_proba(X)
+        return self.model.predict_proba(X)
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "type": type(self.model).__name__,
+            "engine": self.engine,
+            "version": self.version,
+            "features": self.features,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 4),
+        }
+
+
+class ModelRegistry:
+    """Holds the trained models in memory and reloads them on file change.
+
+    A model is deserialized once and then served from memory. Each lookup
+    stats the model file; when it changed, exactly one caller reloads it
+    while every other caller keeps getting the previous model, so requests
+    never block on (or fail because of) a reload in progress. A reload that
+    fails, e.g. on a half-written file, keeps the previous model in service.
+    Each model is served by its configured engine (see ENGINES).
+    `reference_data` returns the dataset compiled models are verified on.
+    """
+
+    def __init__(self, model_dir: str = "models", engine: str = 'compiled',
+                 engines: Optional[Dict[str, str]] = None,
+                 reference_data: Optional[Callable[[], pd.DataFrame]] = None):
+        self.model_dir = model_dir
+        self.engine = engine
+        self.engines = engines or {}
+        self.reference_data = reference_data
+        self._models: Dict[str, LoadedModel] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, model_name: str) -> str:
+        return os.path.join(self.model_dir, model_name)
+
+    def _reference_inputs(self, model_name: str,
+                          compiled: CompiledForest) -> Optional[pd.DataFrame]:
+        """The model's features over (a deterministic sample of) the
+        dataset, or None when it can't be checked there"""
+        if self.reference_data is None or compiled.feature_names is None:
+            return None
+        try:
+            data = self.reference_data()
+        except OSError as e:
+            logger.warning(f"Checking {model_name} on probe inputs only: {e}")
+            return None
+        missing = [feature for feature in compiled.feature_names if feature not in data.columns]
+        if missing:
+            logger.info(f"Checking {model_name} on probe inputs only: "
+                        f"dataset lacks {', '.join(missing)}")
+            return None
+        if len(data) > REFERENCE_ROWS:
+            data = data.iloc[np.linspace(0, len(data) - 1, REFERENCE_ROWS).astype(int)]
+        return data[compiled.feature_names].fillna(0)
+
+    def _compile(self, model_name: str, model) -> Optional[CompiledForest]:
+        """The model's compiled form, when configured and verified.
+
+        Models that don't compile, or don't match their own predict_proba on
+        probe inputs and on the dataset, are served by scikit-learn instead.
+        """
+        if self.engines.get(model_name, self.engine) != 'compiled':
+            return None
+        try:
+            compiled = compile_forest(model)
+            checks = {'probe inputs': probe_inputs(compiled),
+                      'the dataset': self._reference_inputs(model_name, compiled)}
+            for name, X in checks.items():
+                if X is None:
+                    continue
+                difference = max_difference(model, compiled, X)
+                if difference > COMPILE_TOLERANCE:
+                    raise ValueError(
+                        f"differs from predict_proba on {name} by up to {difference:.3g}")
+            return compiled
+        except ValueError as e:
+            logger.warning(f"Serving {model_name} with scikit-learn, not compiled: {e}")
+            return None
+
+    def _load(self, model_name: str, stat: os.stat_result) -> LoadedModel:
+        path = self._path(model_name)
+        started = time.perf_counter()
+        with open(path, 'rb') as f:
+            raw = f.read()
+        version = hashlib.sha256(raw).hexdigest()[:16]
+
+        current = self._models.get(model_name)
+        if current is not None and current.version == version:
+            # File was touched but its content is unchanged
+            return replace(current, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+
+        model = joblib.load(io.BytesIO(raw))
+        compiled = self._compile(model_name, model)
+        features = getattr(model, 'feature_names_in_', None)
+        return LoadedModel(
+            name=model_name,
+            path=path,
+            model=model,
+            version=version,
+            features=[str(f) for f in features] if features is not None else None,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            loaded_at=time.time(),
+            load_seconds=time.perf_counter() - started,
+            compiled=compiled
+        )
+
+    def get(self, model_name: str) -> LoadedModel:
+        """Get a loaded model, reloading it first if its file changed"""
+        current = self._models.get(model_name)
+        try:
+            stat = os.stat(self._path(model_name))
+        except FileNotFoundError:
+            if current is not None:
+                # Keep serving while the file is being replaced
+                return current
+            raise FileNotFoundError(
+                f"Model not found: {self._path(model_name)}. "
+                "Please train the model first.")
+
+        if (current is not None and current.mtime_ns == stat.st_mtime_ns and
+                current.size == stat.st_size):
+            return current
+
+        # The first load has to wait; a reload only happens in one thread
+        if not self._lock.acquire(blocking=current is None):
+            return current
+        try:
+            latest = self._models.get(model_name)
+            if latest is not current and latest is not None:
+                return latest
+            loaded = self._load(model_name, stat)
+            self._models[model_name] = loaded
+            self._errors.pop(model_name, None)
+            if current is not None and current.version != loaded.version:
+                logger.info(f"Reloaded model {model_name} "
+                            f"({current.version} -> {loaded.version})")
+            return loaded
+        except Exception as e:
+            self._errors[model_name] = str(e)
+            if current is None:
+                raise
+            logger.error(f"Failed to reload model {model_name}, "
+                         f"keeping version {current.version}: {e}")
+            return current
+        finally:
+            self._lock.release()
+
+    def warm_up(self, model_names: List[str] = MODEL_NAMES) -> None:
+        """Load every model up front so no request pays for deserialization"""
+        for model_name in model_names:
+            try:
+                loaded = self.get(model_name)
+                logger.info(f"Loaded model {model_name} in "
+                            f"{loaded.load_seconds:.2f}s")
+            except Exception as e:
+                self._errors[model_name] = str(e)
+                logger.warning(f"Could not load model {model_name}: {e}")
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Report which models are loaded, with their metadata"""
+        report = {}
+        for model_name in MODEL_NAMES + sorted(set(self._models) - set(MODEL_NAMES)):
+            loaded = self._models.get(model_name)
+            entry: Dict[str, Any] = {"loaded": loaded is not None}
+            if loaded is not None:
+                entry.update(loaded.metadata())
+            if model_name in self._errors:
+                entry["error"] = self._errors[model_name]
+            report[model_name] = entry
+        return report
+
+
+_engine, _engines = parse_engines(os.environ.get("MODEL_ENGINE", ""))
+model_registry = ModelRegistry(engine=_engine, engines=_engines)
@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.season_cache import SeasonCache
+
+
+@dataclass(frozen=True)
+class SeasonPercentiles:
+    """Percentile index over every numeric column of one season.
+
+    A team's percentile in a stat is the share of the season's teams with a
+    value at or below its own, and 0 when the team is missing the stat.
+    `ranks` holds that for every team and stat.
+    """
+    year: int
+    size: int
+    stats: List[str]
+    ranks: pd.DataFrame
+    index: Dict[int, int]
+
+    def team_percentiles(self, position: int, stats: List[str]) -> Dict[str, float]:
+        """Percentiles of the team in the given dataset row"""
+        row = self.ranks.iloc[self.index[position]]
+        return {stat: float(row[stat]) for stat in stats if stat in self.ranks.columns}
+
+
+def build_season_percentiles(frame: pd.DataFrame, year: int) -> Optional[SeasonPercentiles]:
+    positions = np.flatnonzero(frame['Year'].to_numpy() == year)
+    if len(positions) == 0:
+        return None
+
+    season = frame.iloc[positions].select_dtypes('number')
+    # rank(method='max') is the count of values <= each value
+    ranks = season.rank(method='max').fillna(0) / len(season) * 100
+
+    return SeasonPercentiles(
+        year=year,
+        size=len(season),
+        stats=list(season.columns),
+        ranks=ranks.reset_index(drop=True),
+        index={int(position): i for i, position in enumerate(positions)}
+    )
+
+
+percentile_store = SeasonCache(build_season_percentiles)
+
+
+def get_season_percentiles(frame: pd.DataFrame, version: str, year: int) -> Optional[SeasonPercentiles]:
+    """Get the percentile index of a season for a dataset version"""
+    return percentile_store.get(frame, version, year)
@@ -0,0 +1,221 @@
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import (TOURNAMENT_FEATURES, UPSET_FEATURES,
+                               get_dataset_snapshot)
+from utils.metrics import count_prediction_source, stage
+from utils.model_registry import model_registry
+from utils.rules import PREDICTION_LABELS
+from utils.team_resolver import get_team_index
+
+TOURNAMENT_MODEL = 'tournament_qualification_model.pkl'
+UPSET_MODEL = 'upset_prediction_model.pkl'
+DEEP_RUN_MODEL = 'deep_run_model.pkl'
+
+# Size of the simulated field for seasons without tournament results
+SIMULATED_FIELD_SIZE = 68
+
+
+def _field(year_data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Tournament field of one season: membership mask and seed per row.
+
+    Seeds are positions within the field (1, 2, ...). Seasons without
+    tournament teams use the top teams by efficiency as a simulated field.
+    """
+    in_field = (year_data['made_tournament'] == True).to_numpy(copy=True)
+    seeds = np.full(len(year_data), np.nan)
+    if in_field.any():
+        seeds[in_field] = np.arange(1, in_field.sum() + 1)
+    else:
+        top = year_data['net_efficiency'].to_numpy(dtype=float)
+        order = pd.Series(top).nlargest(SIMULATED_FIELD_SIZE).index.to_numpy()
+        in_field[order] = True
+        seeds[order] = np.arange(1, len(order) + 1)
+    return in_field, seeds
+
+
+def _score(model_name: str, year_data: pd.DataFrame, features, fallback: Callable) -> Tuple[np.ndarray, str]:
+    """Positive-class probabilities from a model, or the rule-based fallback"""
+    try:
+        model = model_registry.get(model_name)
+        with stage('feature_prep'):
+            X = year_data[features].fillna(0)
+        with stage('model_inference'):
+            return model.predict_proba(X)[:, 1], 'model'
+    except (FileNotFoundError, KeyError):
+        with stage('model_inference'):
+            return np.asarray(fallback(year_data), dtype=float), 'fallback'
+
+
+def _tournament_fallback(year_data: pd.DataFrame) -> pd.Series:
+    efficiency = year_data['net_efficiency'].fillna(0)
+    readiness = year_data['tournament_readiness'].fillna(0)
+    return ((efficiency + 10) / 40 + readiness).clip(0, 1)
+
+
+def _upset_fallback(year_data: pd.DataFrame) -> pd.Series:
+    # High seeds with low efficiency; teams outside the field have no seed
+    seeds = year_data['field_seed']
+    efficiency = year_data['net_efficiency'].fillna(0)
+    risk = ((seeds <= 6) & (efficiency < 15)).astype(float) * 0.8
+    return risk.where(year_data['in_field'])
+
+
+def _deep_run_fallback(year_data: pd.DataFrame) -> pd.Series:
+    efficiency = year_data['net_efficiency'].fillna(0)
+    return ((efficiency - 5) / 20).clip(0, 1)
+
+
+# Output column -> (model, features, rule-based fallback)
+PREDICTION_COLUMNS = {
+    'tournament_probability': (TOURNAMENT_MODEL, TOURNAMENT_FEATURES, _tournament_fallback),
+    'upset_risk': (UPSET_MODEL, UPSET_FEATURES, _upset_fallback),
+    'deep_run_probability': (DEEP_RUN_MODEL, UPSET_FEATURES, _deep_run_fallback),
+}
+
+
+def _year_hash(year_data: pd.DataFrame) -> str:
+    hashed = pd.util.hash_pandas_object(year_data, index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()[:16]
+
+
+def _model_version(model_name: str) -> Optional[str]:
+    try:
+        return model_registry.get(model_name).version
+    except FileNotFoundError:
+        return None
+
+
+@dataclass(frozen=True)
+class PredictionSnapshot:
+    """The dataset with every row scored by every model"""
+    frame: pd.DataFrame
+    dataset_version: str
+    key: Tuple
+    sources: Dict[str, str]
+    _arrays: Dict[str, np.ndarray] = field(default_factory=dict, repr=False, compare=False)
+
+    def array(self, column: str) -> np.ndarray:
+        """A column as a NumPy array, converted once per snapshot"""
+        values = self._arrays.get(column)
+        if values is None:
+            values = self._arrays[column] = self.frame[column].to_numpy()
+        return values
+
+
+class PredictionStore:
+    """Materializes model outputs as columns, once per data/model version.
+
+    Scores are kept per (column, season content, model version) block, so a
+    new dataset version only rescores the seasons whose rows changed, and a
+    new model only recomputes its own column. The frame also gets a column
+    of rule-based labels per PREDICTION_LABELS entry, a tuple per row.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[PredictionSnapshot] = None
+        self._blocks: Dict[Tuple[str, str, Optional[str]], Tuple[np.ndarray, str]] = {}
+        self._lock = threading.Lock()
+
+    def _build(self, frame: pd.DataFrame, model_versions: Dict[str, Optional[str]]):
+        columns = {name: np.full(len(frame), np.nan)
+                   for name in ['field_seed', *PREDICTION_COLUMNS]}
+        in_field = np.zeros(len(frame), dtype=bool)
+        sources = {}
+        blocks = {}
+
+        for _, positions in frame.groupby('Year', sort=True).indices.items():
+            year_data = frame.iloc[positions]
+            year_hash = _year_hash(year_data)
+
+            field_mask, seeds = _field(year_data)
+            in_field[positions] = field_mask
+            columns['field_seed'][positions] = seeds
+            year_data = year_data.assign(in_field=field_mask, field_seed=seeds)
+
+            for column, (model_name, features, fallback) in PREDICTION_COLUMNS.items():
+                block_key = (column, year_hash, model_versions[model_name])
+                block = self._blocks.get(block_key)
+                if block is None:
+                    block = _score(model_name, year_data, features, fallback)
+                blocks[block_key] = block
+                columns[column][positions] = block[0]
+                sources[column] = block[1]
+
+        # Drop blocks of seasons or models that are no longer current
+        self._blocks = blocks
+        frame = frame.assign(in_field=in_field, **columns)
+
+        # Labels (key factors, reasons, strengths) of every team in one pass
+        with stage('labels'):
+            labels = {column: rules.evaluate(frame, len(frame))
+                      for column, rules in PREDICTION_LABELS.items()}
+        return frame.assign(**labels), sources
+
+    @staticmethod
+    def _key(snapshot) -> Tuple[Tuple, Dict[str, Optional[str]]]:
+        model_versions = {model_name: _model_version(model_name)
+                          for model_name, _, _ in PREDICTION_COLUMNS.values()}
+        return (snapshot.version, *sorted(model_versions.items())), model_versions
+
+    def version(self) -> Tuple:
+        """The key predictions are built for, without building them"""
+        return self._key(get_dataset_snapshot())[0]
+
+    def get(self) -> PredictionSnapshot:
+        snapshot = get_dataset_snapshot()
+        key, model_versions = self._key(snapshot)
+
+        current = self._snapshot
+        if current is not None and current.key == key:
+            return current
+
+        with self._lock:
+            if self._snapshot is None or self._snapshot.key != key:
+                frame, sources = self._build(snapshot.frame, model_versions)
+                self._snapshot = PredictionSnapshot(
+                    frame, snapshot.version, key, sources)
+            return self._snapshot
+
+
+prediction_store = PredictionStore()
+
+
+def get_predictions() -> PredictionSnapshot:
+    """Get the dataset with materialized prediction columns"""
+    return prediction_store.get()
+
+
+def count_sources(predictions: PredictionSnapshot, *columns: str):
+    """Count, for metrics, which models (or fallbacks) a response used"""
+    for column in columns:
+        count_prediction_source(PREDICTION_COLUMNS[column][0], predictions.sources[column])
+
+
+def score_rows(rows: pd.DataFrame) -> Dict[str, Tuple[np.ndarray, str]]:
+    """Score arbitrary (e.g. hypothetical) rows with every model, one batch
+    per model: values and source ('model' or 'fallback') per column"""
+    return {column: _score(model_name, rows, features, fallback)
+            for column, (model_name, features, fallback) in PREDICTION_COLUMNS.items()}
+
+
+def get_predictions_version() -> Tuple:
+    """Get the dataset and model versions predictions are keyed by"""
+    return prediction_store.version()
+
+
+def get_team_predictions(team_name: str, year: int = 2025,
+                         predictions: Optional[PredictionSnapshot] = None) -> Optional[pd.Series]:
+    """Get a team's row, including its materialized predictions"""
+    predictions = predictions or get_predictions()
+    match = get_team_index(predictions.frame, predictions.dataset_version).resolve(
+        team_name, year)
+
+    if match is None:
+        return None
+    return predictions.frame.iloc[match.position]
@@ -0,0 +1,243 @@
+import contextvars
+import cProfile
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+# Requests carrying this token in the X-Profile-Token header are profiled;
+# it also guards the admin endpoints that serve the stored profiles
+PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN", "")
+# Fraction of all requests to profile, without any header. Their profiles
+# are written to PROFILE_DIR like all others; without PROFILING_TOKEN there
+# are no admin endpoints, and they are read from that directory instead
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+# 'cprofile' (deterministic, stored as pstats) or 'sampling' (stack
+# samples, stored as collapsed stacks for flame graph tools)
+PROFILER = os.environ.get("PROFILER", "cprofile")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 50))
+SAMPLING_INTERVAL = float(os.environ.get("PROFILE_SAMPLING_INTERVAL", 0.005))
+
+PROFILING_ENABLED = bool(PROFILING_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+PROFILE_SUFFIXES = {'cprofile': '.pstats', 'sampling': '.collapsed'}
+
+# Only one cProfile profiler can be active per process (Python 3.12 refuses
+# a second one), so concurrent requests aren't profiled with it
+_cprofile_lock = threading.Lock()
+PROFILE_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+@dataclass
+class ProfileRequest:
+    """A request picked for profiling, and where its profile is stored"""
+    id: str
+    method: str
+    path: str
+    reason: str
+    profiler: str = PROFILER
+
+
+_profile: contextvars.ContextVar[Optional[ProfileRequest]] = contextvars.ContextVar(
+    'profile_request', default=None)
+
+
+def current_profile() -> Optional[ProfileRequest]:
+    return _profile.get()
+
+
+def token_matches(token: Optional[str]) -> bool:
+    return bool(PROFILING_TOKEN) and token is not None and hmac.compare_digest(
+        token.encode(), PROFILING_TOKEN.encode())
+
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval from a helper thread.
+
+    Counts are kept as collapsed stacks ("outer;inner count" lines), the
+    input format of flame graph tools.
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLING_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def collapsed(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class ProfileStore:
+    """Profiles on disk, one data file plus a JSON metadata file each.
+
+    Only the newest `keep` profiles are kept.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR, keep: int = PROFILE_KEEP):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def _meta_path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def data_path(self, profile_id: str, profiler: str) -> str:
+        return os.path.join(self.directory, profile_id + PROFILE_SUFFIXES[profiler])
+
+    def save(self, request: ProfileRequest, seconds: float, write: Callable[[str], None]):
+        os.makedirs(self.directory, exist_ok=True)
+        write(self.data_path(request.id, request.profiler))
+        meta = {**asdict(request), "seconds": round(seconds, 6), "created": time.time()}
+        with open(self._meta_path(request.id), "w") as f:
+            json.dump(meta, f)
+        self._prune()
+
+    def list(self) -> List[Dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        profiles.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # pruned or still being written
+        return sorted(profiles, key=lambda meta: meta["created"], reverse=True)
+
+    def exists(self, profile_id: str) -> bool:
+        return os.path.exists(self._meta_path(profile_id))
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        if not PROFILE_ID.match(profile_id):
+            return None
+        try:
+            with open(self._meta_path(profile_id)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        meta["file"] = self.data_path(profile_id, meta["profiler"])
+        return meta if os.path.exists(meta["file"]) else None
+
+    def _prune(self):
+        with self._lock:
+            for meta in self.list()[self.keep:]:
+                for path in (self._meta_path(meta["id"]),
+                             self.data_path(meta["id"], meta["profiler"])):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+
+profile_store = ProfileStore()
+
+
+def _text_writer(text: str) -> Callable[[str], None]:
+    def write(path: str):
+        with open(path, "w") as f:
+            f.write(text)
+    return write
+
+
+def run_profiled(request: ProfileRequest, fn: Callable, *args, **kwargs):
+    """Run a call under the request's profiler and store the profile.
+
+    With cProfile, a call made while another is being profiled runs
+    unprofiled, and no profile is stored for it.
+    """
+    started = time.perf_counter()
+    if request.profiler == 'sampling':
+        with SamplingProfiler(threading.get_ident()) as sampler:
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile_store.save(request, time.perf_counter() - started,
+                                   _text_writer(sampler.collapsed()))
+
+    if not _cprofile_lock.acquire(blocking=False):
+        return fn(*args, **kwargs)
+    try:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            profile_store.save(request, time.perf_counter() - started, profiler.dump_stats)
+    finally:
+        _cprofile_lock.release()
+
+
+class ProfilingMiddleware:
+    """Picks requests to profile: by X-Profile-Token, or a sampled fraction.
+
+    Only installed when profiling is configured. The profile covers the
+    route handler's work in the compute pool; a picked request whose
+    profile was stored gets an X-Profile-Id response header naming it.
+    Requests that don't reach the pool (response cache hits, /health) or
+    were skipped while another was profiled get none.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _pick(self, scope) -> Optional[str]:
+        for name, value in scope.get('headers', []):
+            if name == b'x-profile-token':
+                return 'token' if token_matches(value.decode('latin-1')) else None
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            return 'sampled'
+        return None
+
+    async def __call__(self, scope, receive, send):
+        reason = self._pick(scope) if scope['type'] == 'http' else None
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        request = ProfileRequest(id=uuid.uuid4().hex, method=scope['method'],
+                                 path=scope['path'], reason=reason)
+        token = _profile.set(request)
+
+        async def send_with_id(message):
+            if message['type'] == 'http.response.start' and profile_store.exists(request.id):
+                message['headers'] = [*message.get('headers', []),
+                                      (b'x-profile-id', request.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _profile.reset(token)
@@ -0,0 +1,209 @@
+import asyncio
+import functools
+import gzip
+import hashlib
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import brotli
+except ImportError:  # responses are still served as gzip or identity
+    brotli = None
+
+# Preferred first when a client accepts several encodings
+ENCODINGS = ['br', 'gzip']
+
+# Bodies this small aren't worth a compressed variant
+MIN_COMPRESS_SIZE = 512
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A serialized response and its precompressed variants.
+
+    `variants` maps a content encoding ('identity', 'gzip', 'br') to its
+    body. Each variant has its own strong ETag, since its bytes differ.
+    """
+    variants: Dict[str, bytes]
+    etag: str
+
+    def etag_for(self, encoding: str) -> str:
+        if encoding == 'identity':
+            return f'"{self.etag}"'
+        return f'"{self.etag}-{encoding}"'
+
+    def matches(self, if_none_match: str) -> bool:
+        # If-None-Match uses weak comparison, so W/ prefixes are ignored
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or any(self.etag_for(encoding) in tags for encoding in self.variants)
+
+    @property
+    def size(self) -> int:
+        return sum(len(body) for body in self.variants.values())
+
+
+def _compress(body: bytes) -> Dict[str, bytes]:
+    variants = {'identity': body}
+    if len(body) < MIN_COMPRESS_SIZE:
+        return variants
+    # mtime=0 keeps the gzip bytes, and so the ETag, reproducible
+    variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+    if brotli is not None:
+        variants['br'] = brotli.compress(body)
+    return variants
+
+
+def build_cached_response(content: Any) -> CachedResponse:
+    """Serialize content the way FastAPI would, then compress it once.
+
+    Content already rendered as a response (see FastJSONResponse) is
+    cached as is.
+    """
+    if isinstance(content, Response):
+        body = content.body
+    else:
+        body = JSONResponse(jsonable_encoder(content)).body
+    return CachedResponse(
+        variants=_compress(body),
+        etag=hashlib.sha256(body).hexdigest()[:32]
+    )
+
+
+def accepted_encoding(accept_encoding: str, available) -> str:
+    """Pick the best available encoding a client's Accept-Encoding allows"""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for encoding in ENCODINGS:
+        if encoding in available and accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return 'identity'
+
+
+class ResponseCache:
+    """Bounded LRU of serialized responses.
+
+    Keys include the version of the data a response was built from, so a
+    new dataset or model makes old entries unreachable; they then age out
+    of the LRU instead of being invalidated explicitly.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key: Hashable, entry: CachedResponse):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": sum(entry.size for entry in self._entries.values()),
+                "hits": self._hits,
+                "misses": self._misses
+            }
+
+
+response_cache = ResponseCache(int(os.environ.get("RESPONSE_CACHE_SIZE", 256)))
+
+CACHE_MAX_AGE = int(os.environ.get("RESPONSE_CACHE_MAX_AGE", 60))
+
+
+def _cache_key(path: str, kwargs: dict, version: Hashable) -> Tuple:
+    params: List[Tuple[str, Hashable]] = []
+    for name, value in sorted(kwargs.items()):
+        params.append((name, tuple(value) if isinstance(value, list) else value))
+    return path, tuple(params), version
+
+
+def cached_response(version: Callable[[], Hashable], max_age: Optional[int] = None):
+    """Cache a read-only route's JSON per parameters and data version.
+
+    `version` returns the version of the data the route reads (dataset,
+    models), checked on every request. Responses carry strong ETags and
+    Cache-Control, answer If-None-Match with 304, and are sent in the best
+    precompressed encoding the client accepts.
+
+    Checking the version may reload a changed dataset or model, and a miss
+    compresses the body, so both run in a thread, off the event loop.
+    """
+    max_age = CACHE_MAX_AGE if max_age is None else max_age
+    cache_control = f"public, max-age={max_age}"
+
+    def decorator(endpoint: Callable) -> Callable:
+        signature = inspect.signature(endpoint)
+
+        @functools.wraps(endpoint)
+        async def cached_endpoint(request: Request, **kwargs):
+            key = _cache_key(request.url.path, kwargs, await asyncio.to_thread(version))
+            entry = response_cache.get(key)
+            if entry is None:
+                content = await endpoint(**kwargs)
+                entry = await asyncio.to_thread(build_cached_response, content)
+                response_cache.put(key, entry)
+
+            encoding = accepted_encoding(
+                request.headers.get('accept-encoding', ''), entry.variants)
+            headers = {
+                'ETag': entry.etag_for(encoding),
+                'Cache-Control': cache_control,
+                'Vary': 'Accept-Encoding'
+            }
+
+            if_none_match = request.headers.get('if-none-match')
+            if if_none_match is not None and entry.matches(if_none_match):
+                return Response(status_code=304, headers=headers)
+
+            if encoding != 'identity':
+                headers['Content-Encoding'] = encoding
+            return Response(content=entry.variants[encoding],
+                            media_type='application/json', headers=headers)
+
+        # FastAPI reads the route's parameters from the signature
+        cached_endpoint.__signature__ = signature.replace(parameters=[
+            inspect.Parameter('request', inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            *[parameter.replace(kind=inspect.Parameter.KEYWORD_ONLY)
+              for parameter in signature.parameters.values()]
+        ])
+        return cached_endpoint
+
+    return decorator
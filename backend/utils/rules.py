@@ -0,0 +1,109 @@
+import operator
+from dataclasses import dataclass
+from typing import Any, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A label for the teams whose `column` compares `op` to `threshold`.
+
+    `default` stands in for the column when the data doesn't have it at
+    all; a team missing the value (NaN) never matches.
+    """
+    label: str
+    column: str
+    op: str
+    threshold: float
+    default: float
+
+    def mask(self, values: Mapping[str, Any], size: int) -> np.ndarray:
+        if self.column in values:
+            column = np.asarray(values[self.column], dtype=float)
+        else:
+            column = np.full(size, self.default, dtype=float)
+        return OPERATORS[self.op](column, self.threshold)
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """Rules whose matching labels, in order, describe each team.
+
+    `otherwise` is the label of teams matching none of the rules.
+    """
+    rules: Tuple[Rule, ...]
+    otherwise: Optional[str] = None
+
+    def _labels(self, code: int) -> Tuple[str, ...]:
+        labels = tuple(rule.label for bit, rule in enumerate(self.rules) if code >> bit & 1)
+        if not labels and self.otherwise is not None:
+            return (self.otherwise,)
+        return labels
+
+    def evaluate(self, values: Mapping[str, Any], size: int) -> np.ndarray:
+        """Labels of every team, as an object array of tuples.
+
+        `values` maps columns to arrays of `size` values, like a DataFrame.
+        Each team's matches are packed into a bit code, so only the label
+        tuples of the codes that occur are built.
+        """
+        codes = np.zeros(size, dtype=np.int64)
+        for bit, rule in enumerate(self.rules):
+            codes |= rule.mask(values, size).astype(np.int64) << bit
+
+        present, inverse = np.unique(codes, return_inverse=True)
+        labels = np.empty(len(present), dtype=object)
+        labels[:] = [self._labels(int(code)) for code in present]
+        return labels[inverse.reshape(-1)]
+
+    def labels(self, values: Mapping[str, Any]) -> List[str]:
+        """Labels of a single team, from scalar values"""
+        return list(self.evaluate({column: [value] for column, value in values.items()}, 1)[0])
+
+
+KEY_FACTORS = RuleSet((
+    Rule("Strong efficiency metrics", 'net_efficiency', '>', 15, default=0),
+    Rule("High tournament readiness", 'tournament_readiness', '>', 0.7, default=0),
+    Rule("Elite player talent", 'player_BPM_max', '>', 10, default=0),
+    Rule("Strong win record", 'wins', '>', 25, default=0),
+), otherwise="Standard performance metrics")
+
+UPSET_REASONS = RuleSet((
+    Rule("Below-average efficiency", 'net_efficiency', '<', 15, default=0),
+    Rule("Inconsistent record", 'win_percentage', '<', 0.8, default=1),
+    Rule("Low tournament readiness", 'tournament_readiness', '<', 0.6, default=1),
+), otherwise="Standard performance indicators")
+
+CINDERELLA_STRENGTHS = RuleSet((
+    Rule("Strong efficiency", 'net_efficiency', '>', 15, default=0),
+    Rule("Star player", 'player_BPM_max', '>', 8, default=0),
+    Rule("Elite defense", 'AdjDE', '<', 95, default=110),
+), otherwise="Solid fundamentals")
+
+# Team profiles rate some stats by the team's percentile within its
+# season, given as '<stat>_percentile'
+PROFILE_STRENGTHS = RuleSet((
+    Rule("Elite offense", 'AdjOE_percentile', '>', 75, default=50),
+    Rule("Strong defense", 'AdjDE_percentile', '>', 75, default=50),
+    Rule("Consistent wins", 'win_percentage', '>', 0.8, default=0.5),
+))
+
+PROFILE_WEAKNESSES = RuleSet((
+    Rule("Below-average efficiency", 'net_efficiency_percentile', '<', 25, default=50),
+    Rule("Inconsistent record", 'win_percentage', '<', 0.6, default=0.5),
+))
+
+# Label column of the prediction frame -> rules it is evaluated from
+PREDICTION_LABELS = {
+    'key_factors': KEY_FACTORS,
+    'upset_reasons': UPSET_REASONS,
+    'cinderella_strengths': CINDERELLA_STRENGTHS,
+}
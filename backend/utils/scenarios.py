@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import TOURNAMENT_FEATURES, UPSET_FEATURES
+from utils.predictions import score_rows
+
+# Every model input
+MODEL_FEATURES = list(dict.fromkeys(TOURNAMENT_FEATURES + UPSET_FEATURES))
+
+# Columns the models (or their fallbacks) read besides their features
+CONTEXT_COLUMNS = ['in_field', 'field_seed']
+
+# Features the dataset derives from others; recomputed when one of their
+# inputs is perturbed and they aren't perturbed themselves
+DERIVED_FEATURES: Dict[str, tuple] = {
+    'net_efficiency': (('AdjOE', 'AdjDE'), lambda rows: rows['AdjOE'] - rows['AdjDE']),
+    'win_percentage': (('wins', 'losses'),
+                       lambda rows: rows['wins'] / (rows['wins'] + rows['losses'])),
+}
+
+
+def scenario_features(frame: pd.DataFrame) -> List[str]:
+    """Features that can be perturbed: the model inputs the dataset has
+    (the upset models' derived features, e.g. seed_efficiency_gap, aren't
+    columns of it)"""
+    return [feature for feature in MODEL_FEATURES if feature in frame.columns]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Changes to some features of a team, one row per scenario.
+
+    `deltas` maps each perturbed feature to the amount added to the
+    team's value, per scenario.
+    """
+    deltas: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(next(iter(self.deltas.values())))
+
+
+def curve(feature: str, deltas: Sequence[float]) -> Scenario:
+    """Scenarios varying one feature at a time"""
+    return Scenario({feature: np.asarray(deltas, dtype=float)})
+
+
+def grid(deltas: Dict[str, Sequence[float]]) -> Scenario:
+    """Scenarios for every combination of the features' deltas, the last
+    feature varying fastest"""
+    mesh = np.meshgrid(*[np.asarray(values, dtype=float) for values in deltas.values()],
+                       indexing='ij')
+    return Scenario({feature: axis.ravel() for feature, axis in zip(deltas, mesh)})
+
+
+def _scenario_rows(team: pd.Series, scenarios: List[Scenario]) -> pd.DataFrame:
+    """The team's row once per scenario, baseline first, with the deltas applied"""
+    sources = [source for inputs, _ in DERIVED_FEATURES.values() for source in inputs]
+    columns = [column for column in dict.fromkeys(MODEL_FEATURES + CONTEXT_COLUMNS + sources)
+               if column in team.index]
+    size = 1 + sum(len(scenario) for scenario in scenarios)
+    rows = pd.DataFrame({column: np.repeat(team[column], size) for column in columns})
+
+    # Rows in which each feature was changed; a zero delta leaves the row as stored
+    changed: Dict[str, np.ndarray] = {column: np.zeros(size, dtype=bool) for column in columns}
+    start = 1
+    for scenario in scenarios:
+        end = start + len(scenario)
+        for feature, deltas in scenario.deltas.items():
+            values = rows[feature].to_numpy(dtype=float, copy=True)
+            values[start:end] += deltas
+            rows[feature] = values
+            changed[feature][start:end] = deltas != 0
+        start = end
+
+    for feature, (inputs, derive) in DERIVED_FEATURES.items():
+        if feature not in rows or not all(source in rows for source in inputs):
+            continue
+        mask = np.logical_or.reduce([changed[source] for source in inputs]) & ~changed[feature]
+        if mask.any():
+            values = rows[feature].to_numpy(dtype=float, copy=True)
+            values[mask] = derive(rows[mask])
+            rows[feature] = values
+    return rows
+
+
+def evaluate(team: pd.Series, scenarios: List[Scenario]) -> Dict[str, Dict]:
+    """Score the team's baseline and every scenario with every model.
+
+    All scenarios are stacked into one matrix, so each model is called
+    once. Returns, per prediction column, the baseline value, the values
+    per scenario (split like `scenarios`) and whether a model or its
+    rule-based fallback produced them.
+    """
+    rows = _scenario_rows(team, scenarios)
+    results = {}
+    for column, (values, source) in score_rows(rows).items():
+        curves, start = [], 1
+        for scenario in scenarios:
+            curves.append(values[start:start + len(scenario)])
+            start += len(scenario)
+        results[column] = {"baseline": values[0], "curves": curves, "source": source}
+    return results
+
@@ -0,0 +1,30 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import pandas as pd
+
+
+class SeasonCache:
+    """Per-season artifacts derived from the dataset.
+
+    Each season is built on first use with `build(frame, year)` and kept
+    until the version changes, when everything is dropped at once. The
+    version is the dataset's, or any key covering what the build reads.
+    """
+
+    def __init__(self, build: Callable[[pd.DataFrame, int], Any]):
+        self._build = build
+        self._version: Optional[Hashable] = None
+        self._seasons: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, frame: pd.DataFrame, version: Hashable, year: int):
+        if self._version == version and year in self._seasons:
+            return self._seasons[year]
+        with self._lock:
+            if self._version != version:
+                self._version = version
+                self._seasons = {}
+            if year not in self._seasons:
+                self._seasons[year] = self._build(frame, year)
+            return self._seasons[year]
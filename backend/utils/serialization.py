@@ -0,0 +1,72 @@
+import json
+from typing import Any, Dict, List, Sequence, Type
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # responses are encoded with the json module instead
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encode plain data (dicts, lists, str, int, float, None) as JSON"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response for content that is already plain data.
+
+    Route handlers return it to skip FastAPI's response-model validation
+    and jsonable_encoder pass; the route's response_model still documents
+    the schema.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rounded(values, digits: int) -> List[float]:
+    return np.round(np.asarray(values, dtype=float), digits).tolist()
+
+
+def optional_ints(values) -> List[Any]:
+    """Integers, with None for missing values"""
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    integers = np.where(missing, 0, values).astype(np.int64).astype(object)
+    integers[missing] = None
+    return integers.tolist()
+
+
+def nullable(values) -> List[Any]:
+    """Values as they are, with None for missing ones"""
+    values = np.asarray(values, dtype=object)
+    return np.where(pd.isna(values), None, values).tolist()
+
+
+def records(columns: Dict[str, Sequence]) -> List[Dict[str, Any]]:
+    """Rows as dicts from equally long columns of plain values"""
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def model_records(model: Type[BaseModel], columns: Dict[str, Sequence]) -> List[Dict[str, Any]]:
+    """Rows of a response model, built from columns without validating each row.
+
+    The columns must be exactly the model's fields, in order, and hold
+    values of the field types; serialized, the rows match what the model
+    would produce.
+    """
+    fields = list(model.model_fields)
+    if list(columns) != fields:
+        raise ValueError(f"Columns {list(columns)} don't match the fields of "
+                         f"{model.__name__}: {fields}")
+    return records(columns)
@@ -0,0 +1,220 @@
+import bisect
+import difflib
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.metrics import stage
+
+# Common names that don't normalize to the dataset's spelling
+TEAM_ALIASES = {
+    'uconn': 'connecticut',
+    'ole miss': 'mississippi',
+    'unc': 'north carolina',
+    'north carolina st': 'nc st',
+    'miami': 'miami fl',
+    'pitt': 'pittsburgh',
+    'umass': 'massachusetts',
+    'etsu': 'east tennessee st',
+    'fau': 'florida atlantic',
+    'fgcu': 'florida gulf coast',
+    'uic': 'illinois chicago',
+    'lmu': 'loyola marymount',
+    'sfa': 'stephen f austin',
+    'ucsb': 'uc santa barbara',
+    'st marys': 'saint marys',
+    'st josephs': 'saint josephs',
+    'st peters': 'saint peters',
+    'st louis': 'saint louis',
+    'texas a&m corpus christi': 'texas a&m corpus chris',
+}
+
+# Score bands, so that any exact/alias/prefix match outranks a fuzzy one
+EXACT_SCORE = 1.0
+ALIAS_SCORE = 0.99
+PREFIX_SCORE = 0.9
+WORD_PREFIX_SCORE = 0.75
+SUBSTRING_SCORE = 0.6
+FUZZY_CUTOFF = 0.6
+
+
+def normalize_team_name(name: str) -> str:
+    """Normalize a team name for lookups ("Michigan State." -> "michigan st")"""
+    name = unicodedata.normalize('NFKD', str(name))
+    name = name.encode('ascii', 'ignore').decode().lower()
+    name = re.sub(r"['.]", '', name)
+    name = re.sub(r'[^a-z0-9&]+', ' ', name)
+    tokens = ['st' if token == 'state' else token for token in name.split()]
+    return ' '.join(tokens)
+
+
+@dataclass(frozen=True)
+class TeamMatch:
+    """A resolved team name and where its row sits in the dataset"""
+    team: str
+    year: Optional[int]
+    position: Optional[int]
+    match_type: str
+    score: float
+
+
+class TeamIndex:
+    """Prebuilt (team, year) index over the dataset's team names.
+
+    Exact and alias lookups are dictionary hits and prefix lookups are a
+    binary search over the sorted names. Only when those miss does a query
+    fall back to a scan, ranked by match quality and then by the team's
+    position in the dataset (its ranking), so results are deterministic.
+    """
+
+    def __init__(self, frame: pd.DataFrame, version: str):
+        self.version = version
+        self._display: Dict[str, str] = {}
+        self._positions: Dict[Tuple[str, int], int] = {}
+        self._years: Dict[str, List[int]] = {}
+        self._order: Dict[Tuple[str, Optional[int]], int] = {}
+        self._sorted: Dict[Optional[int], List[str]] = {}
+
+        teams = frame['Team'].to_numpy()
+        years = frame['Year'].to_numpy()
+        order_in_year = frame.groupby('Year').cumcount().to_numpy()
+
+        for position, (team, year, order) in enumerate(zip(teams, years, order_in_year)):
+            if pd.isna(team):
+                continue
+            key = normalize_team_name(team)
+            year = int(year)
+            if (key, year) in self._positions:
+                continue
+            self._display.setdefault(key, team)
+            self._positions[(key, year)] = position
+            self._years.setdefault(key, []).append(year)
+            self._order[(key, year)] = int(order)
+            self._order[(key, None)] = min(
+                self._order.get((key, None), int(order)), int(order))
+
+        for key, key_years in self._years.items():
+            key_years.sort()
+            for year in key_years:
+                self._sorted.setdefault(year, []).append(key)
+        self._sorted[None] = sorted(self._display)
+        for year in self._sorted:
+            self._sorted[year].sort()
+
+        self._aliases = {alias: target for alias, target in TEAM_ALIASES.items()
+                         if target in self._display}
+
+    def _names(self, year: Optional[int]) -> List[str]:
+        return self._sorted.get(year, [])
+
+    def _has(self, key: str, year: Optional[int]) -> bool:
+        return key in self._display if year is None else (key, year) in self._positions
+
+    def _match(self, key: str, year: Optional[int], match_type: str, score: float) -> TeamMatch:
+        return TeamMatch(
+            team=self._display[key],
+            year=year,
+            position=self._positions.get((key, year)),
+            match_type=match_type,
+            score=round(score, 3)
+        )
+
+    def _prefix_keys(self, query: str, year: Optional[int]) -> List[str]:
+        names = self._names(year)
+        start = bisect.bisect_left(names, query)
+        end = bisect.bisect_left(names, query + '\x7f', lo=start)
+        return names[start:end]
+
+    def _ranked(self, query: str, year: Optional[int]) -> List[Tuple[float, str, str]]:
+        """Score every name for a query: (score, key, match_type)"""
+        ranked = []
+        if self._has(query, year):
+            ranked.append((EXACT_SCORE, query, 'exact'))
+        alias = self._aliases.get(query)
+        if alias is not None and alias != query and self._has(alias, year):
+            ranked.append((ALIAS_SCORE, alias, 'alias'))
+
+        seen = {key for _, key, _ in ranked}
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(query)
+        for key in self._names(year):
+            if key in seen:
+                continue
+            closeness = len(query) / len(key)
+            if key.startswith(query):
+                ranked.append((PREFIX_SCORE + 0.09 * closeness, key, 'prefix'))
+            elif (' ' + query) in (' ' + key):
+                ranked.append((WORD_PREFIX_SCORE + 0.1 * closeness, key, 'word_prefix'))
+            elif query in key:
+                ranked.append((SUBSTRING_SCORE + 0.1 * closeness, key, 'substring'))
+            else:
+                # Cheap upper bounds first, as difflib.get_close_matches does
+                matcher.set_seq1(key)
+                if (matcher.real_quick_ratio() >= FUZZY_CUTOFF and
+                        matcher.quick_ratio() >= FUZZY_CUTOFF):
+                    ratio = matcher.ratio()
+                    if ratio >= FUZZY_CUTOFF:
+                        ranked.append((SUBSTRING_SCORE * ratio, key, 'fuzzy'))
+
+        ranked.sort(key=lambda item: (-item[0], self._order[(item[1], year)], item[1]))
+        return ranked
+
+    def resolve(self, name: str, year: Optional[int] = None) -> Optional[TeamMatch]:
+        """Resolve a user-supplied team name to the single best match"""
+        with stage('team_resolution'):
+            return self._resolve(name, year)
+
+    def _resolve(self, name: str, year: Optional[int]) -> Optional[TeamMatch]:
+        query = normalize_team_name(name)
+        if not query:
+            return None
+
+        # Fast paths: exact, alias, then the shortest name with this prefix
+        if self._has(query, year):
+            return self._match(query, year, 'exact', EXACT_SCORE)
+        alias = self._aliases.get(query)
+        if alias is not None and self._has(alias, year):
+            return self._match(alias, year, 'alias', ALIAS_SCORE)
+        prefixed = self._prefix_keys(query, year)
+        if prefixed:
+            key = min(prefixed, key=lambda k: (len(k), self._order[(k, year)], k))
+            return self._match(key, year, 'prefix',
+                               PREFIX_SCORE + 0.09 * len(query) / len(key))
+
+        ranked = self._ranked(query, year)
+        if not ranked:
+            return None
+        score, key, match_type = ranked[0]
+        return self._match(key, year, match_type, score)
+
+    def search(self, query: str, year: Optional[int] = None, limit: int = 10) -> List[TeamMatch]:
+        """Rank team names for a (partial) query, best match first"""
+        query = normalize_team_name(query)
+        if not query or limit <= 0:
+            return []
+        with stage('team_resolution'):
+            return [self._match(key, year, match_type, score)
+                    for score, key, match_type in self._ranked(query, year)[:limit]]
+
+    def years(self, team: str) -> List[int]:
+        return list(self._years.get(normalize_team_name(team), []))
+
+
+_index: Optional[TeamIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_team_index(frame: pd.DataFrame, version: str) -> TeamIndex:
+    """Get the team index for a dataset version, building it on first use"""
+    global _index
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _index_lock, stage('team_resolution'):
+        if _index is None or _index.version != version:
+            _index = TeamIndex(frame, version)
+        return _index
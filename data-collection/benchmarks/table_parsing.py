@@ -0,0 +1,295 @@
+"""Table extraction with lxml (tables.py) against the BeautifulSoup parser it replaced.
+
+Run from the data-collection directory:
+    python benchmarks/table_parsing.py [data/pages] [--repeat 5]
+    python benchmarks/table_parsing.py --synthetic
+
+Pages are the HTML files of a directory, e.g. saved with
+BartTorvik(save_pages_dir=...); --synthetic generates rankings- and
+players-like pages instead, with the markup the parsers special-case
+(two header rows, colspans, <br>, links, hidden cells, comments, scripts).
+For every table of every page, with and without hidden-cell filtering,
+both parsers must produce the same headers, rows and DataFrame. Then
+parsing and extracting each page's main table is timed with both.
+Exits 1 on any difference.
+"""
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import time
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+DATA_COLLECTION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# The BeautifulSoup parser tables.py replaced, as scraper.py had it
+
+def reference_is_visible(tag):
+    style = tag.get('style', '')
+    return 'display: none' not in style.lower()
+
+
+def reference_text_before_br(tag):
+    text_before_br = ""
+    for content in tag.contents:
+        if content.name == 'br':
+            break
+        if hasattr(content, 'strip'):
+            text_before_br += content.strip()
+        else:
+            text_before_br += str(content).strip()
+    return text_before_br
+
+
+def reference_headers(table, filter_hidden=False):
+    headers = []
+    thead = table.find('thead')
+    if not thead:
+        return headers
+
+    header_rows = thead.find_all('tr')
+
+    if len(header_rows) == 1:
+        for th in header_rows[0].find_all(['th', 'td']):
+            if not filter_hidden or reference_is_visible(th):
+                headers.append(th.text.strip())
+    elif len(header_rows) == 2:
+        row1_expanded = []
+        row2_headers = []
+
+        for th in header_rows[0].find_all(['th', 'td']):
+            if not filter_hidden or reference_is_visible(th):
+                if th.find('br'):
+                    text = reference_text_before_br(th)
+                else:
+                    text = th.text.strip()
+
+                colspan = int(th.get('colspan', 1))
+                for _ in range(colspan):
+                    row1_expanded.append(text)
+
+        for th in header_rows[1].find_all(['th', 'td']):
+            if not filter_hidden or reference_is_visible(th):
+                row2_headers.append(th.text.strip())
+
+        max_len = max(len(row1_expanded), len(row2_headers))
+        row1_expanded.extend([''] * (max_len - len(row1_expanded)))
+        row2_headers.extend([''] * (max_len - len(row2_headers)))
+
+        for r1, r2 in zip(row1_expanded, row2_headers):
+            if r1 and r2:
+                headers.append(f"{r1} - {r2}")
+            elif r1:
+                headers.append(r1)
+            elif r2:
+                headers.append(r2)
+            else:
+                headers.append("")
+
+    return headers
+
+
+def reference_rows(table, filter_hidden=False):
+    rows = []
+    tbody = table.find('tbody')
+
+    if not tbody:
+        tbody = table
+
+    for row in tbody.find_all('tr'):
+        cells = row.find_all(['td', 'th'])
+        if not cells:
+            continue
+
+        row_data = []
+        for cell in cells:
+            if not filter_hidden or reference_is_visible(cell):
+                link = cell.find('a')
+                if link:
+                    cell_text = link.text.strip()
+                elif cell.find('br'):
+                    cell_text = reference_text_before_br(cell)
+                else:
+                    cell_text = cell.get_text(strip=True)
+
+                row_data.append(cell_text)
+
+        if row_data and any(cell.strip() for cell in row_data):
+            rows.append(row_data)
+
+    return rows
+
+
+def reference_frame(scraper, headers, rows, year):
+    if not rows:
+        return None
+
+    max_cols = max(len(row) for row in rows)
+    if len(headers) < max_cols:
+        for i in range(len(headers), max_cols):
+            headers.append(f"Column_{i+1}")
+    elif len(headers) > max_cols:
+        headers = headers[:max_cols]
+    headers = scraper._ensure_unique_columns(headers)
+
+    normalized_rows = [row + [''] * (max_cols - len(row)) for row in rows]
+    df = pd.DataFrame(normalized_rows, columns=headers)
+    df['Year'] = year
+    return df
+
+
+def page_differences(scraper, html, year=2025):
+    """How the lxml parser's tables of a page differ from the reference
+    parser's: for every table, with and without hidden-cell filtering, the
+    headers, rows and DataFrame must be the same. Empty when they all are"""
+    from tables import parse_document, parse_headers, parse_rows
+
+    reference_tables = BeautifulSoup(html, 'html.parser').find_all('table')
+    tables = list(parse_document(html).iter('table'))
+    if len(tables) != len(reference_tables):
+        return [f"{len(tables)} tables, expected {len(reference_tables)}"]
+
+    differences = []
+    for i, (reference, table) in enumerate(zip(reference_tables, tables)):
+        for filter_hidden in (False, True):
+            expected = (reference_headers(reference, filter_hidden),
+                        reference_rows(reference, filter_hidden))
+            actual = (parse_headers(table, filter_hidden), parse_rows(table, filter_hidden))
+            if actual != expected:
+                differences.append(f"table {i + 1} (filter_hidden={filter_hidden}) differs")
+                continue
+            expected_df = reference_frame(scraper, *expected, year)
+            actual_df = scraper._create_dataframe(*actual, year)
+            if expected_df is None or actual_df is None:
+                same = expected_df is None and actual_df is None
+            else:
+                same = expected_df.equals(actual_df) and \
+                    list(expected_df.columns) == list(actual_df.columns)
+            if not same:
+                differences.append(f"table {i + 1} DataFrame differs")
+    return differences
+
+
+# Synthetic pages
+
+def synthetic_rankings(rng, teams=365):
+    head = ('<thead><tr><th colspan="2">Rk<br><span>sort</span></th><th>Team</th>'
+            '<th colspan="2">AdjOE<!-- offense --><br>pts/100</th>'
+            '<th colspan="2">AdjDE</th><th rowspan="2">Barthag</th></tr>'
+            '<tr><th></th><th>Conf</th><th></th><th>Val</th><th>Rank</th>'
+            '<th>Val</th><th>Rank</th></tr></thead>')
+    rows = []
+    for i in range(1, teams + 1):
+        seed = f'<span class="seed">{rng.randint(1, 16)} seed</span>' if i <= 68 else ''
+        rows.append(
+            f'<tr class="seedrow"><td>{i}</td><td><a href="conf.php">ACC</a></td>'
+            f'<td><a href="team.php?t={i}">Team&nbsp;{i}</a><br>{seed}</td>'
+            f'<td>{rng.uniform(90, 125):.1f}<br><span class="lowrow">{i}</span></td>'
+            f'<td> {i} </td><td>{rng.uniform(85, 115):.1f}<br>{i}</td><td>{i}</td>'
+            f'<td>.{rng.randint(100, 999)}<script>shade({i})</script></td></tr>')
+        if i % 50 == 0:
+            rows.append('<tr class="spacer"><td></td><td> </td></tr>')
+    return (f'<html><head><title>T-Rank</title></head><body><table id="ranks">{head}'
+            f'<tbody>{"".join(rows)}</tbody></table></body></html>')
+
+
+def synthetic_players(rng, players=4000):
+    head = ('<thead><tr><th>Rk</th><th>Player</th><th style="display: none">Pid</th>'
+            '<th>Team</th><th>Conf</th><th>Min%</th><th>ORtg</th><th>Usg</th>'
+            '<th>eFG</th><th>BPM</th></tr></thead>')
+    rows = []
+    for i in range(players):
+        rows.append(
+            f'<tr><td>{i + 1}</td><td><a href="playerstat.php?p={i}">Player {i}</a>'
+            f'<!-- {i} --></td><td style="display: none">{i}</td>'
+            f'<td><a href="team.php?t={i % 362}">Team {i % 362}</a></td><td>B10</td>'
+            f'<td>{rng.uniform(10, 90):.1f}</td><td>{rng.uniform(70, 130):.1f}</td>'
+            f'<td> {rng.uniform(10, 35):.1f} </td><td>{rng.uniform(40, 60):.1f}</td>'
+            f'<td>{rng.uniform(-5, 12):.1f}</td></tr>')
+    return ('<html><body><table style="display:none"><tr><td>filters</td></tr></table>'
+            '<table style="white-space:nowrap;margin:auto;table-layout:fixed">'
+            f'{head}<tbody>{"".join(rows)}</tbody></table></body></html>')
+
+
+def synthetic_pages(seed=0):
+    rng = random.Random(seed)
+    return {'synthetic_trank.html': synthetic_rankings(rng),
+            'synthetic_playerstat.html': synthetic_players(rng)}
+
+
+def median_ms(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pages", nargs="?", default="data/pages")
+    parser.add_argument("--synthetic", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(DATA_COLLECTION_DIR)
+    sys.path.insert(0, DATA_COLLECTION_DIR)
+    from scraper import BartTorvik
+    from tables import parse_document, parse_headers, parse_rows
+
+    if args.synthetic:
+        pages = synthetic_pages()
+    else:
+        paths = sorted(glob.glob(os.path.join(args.pages, "*.html")))
+        if not paths:
+            sys.exit(f"No pages in {args.pages}; save some with "
+                     "BartTorvik(save_pages_dir=...) or use --synthetic")
+        pages = {}
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                pages[os.path.basename(path)] = f.read()
+
+    scraper = BartTorvik(delay=0)
+    failed = False
+    print(f"{'page':<44} {'tables':>6} {'rows':>6} {'bs4 ms':>9} {'lxml ms':>9} {'speedup':>8}")
+
+    for name, html in pages.items():
+        differences = page_differences(scraper, html)
+        for difference in differences:
+            print(f"{name}: {difference} FAILED")
+        failed = failed or bool(differences)
+
+        tables = list(parse_document(html).iter('table'))
+        # The page's largest table, as the scraper would extract it
+        main_table = max(range(len(tables)), key=lambda i: len(tables[i].findall('.//tr')),
+                         default=None)
+        if main_table is None:
+            continue
+
+        def with_bs4():
+            table = BeautifulSoup(html, 'html.parser').find_all('table')[main_table]
+            reference_headers(table, True), reference_rows(table, True)
+
+        def with_lxml():
+            table = list(parse_document(html).iter('table'))[main_table]
+            parse_headers(table, True), parse_rows(table, True)
+
+        bs4_ms = median_ms(args.repeat, with_bs4)
+        lxml_ms = median_ms(args.repeat, with_lxml)
+        rows = len(parse_rows(tables[main_table], True))
+        print(f"{name:<44} {len(tables):>6} {rows:>6} {bs4_ms:>9.1f} {lxml_ms:>9.1f} "
+              f"{bs4_ms / lxml_ms:>7.1f}x")
+
+    scraper.close()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
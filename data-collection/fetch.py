@@ -0,0 +1,203 @@
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from page_cache import PageCache
+from rate_limit import RunStats, TokenBucket, backoff_delay, retry_after_seconds
+
+CHALLENGE_MARKER = "Verifying your browser"
+
+# Why an HTTP response wasn't used; only these send the URL to the browser,
+# which can pass the challenge and run the page's JavaScript
+CHALLENGED = "browser challenge"
+NOT_RENDERED = "table not rendered"
+BROWSER_REASONS = (CHALLENGED, NOT_RENDERED)
+
+# Statuses by which the site says we're going too fast; they slow the limiter
+THROTTLE_STATUSES = (429, 503)
+
+USER_AGENT = ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+
+def has_table(html):
+    """Whether the page holds a table with data cells, i.e. was rendered
+    server-side"""
+    start = html.find('<table')
+    return start != -1 and html.find('<td', start) != -1
+
+
+def page_filename(url):
+    """File name a page is saved (and served as a fixture) under: its path
+    and query, e.g. trank.php?year=2025 -> trank.php_year=2025.html"""
+    parts = urlsplit(url)
+    name = parts.path.strip('/') or 'index'
+    if parts.query:
+        name += '_' + parts.query
+    return re.sub(r'[^\w.=-]', '_', name) + '.html'
+
+
+@dataclass
+class FetchRecord:
+    path: str
+    reason: str
+    status: Optional[int]
+    seconds: float
+
+
+class PageFetcher:
+    """Fetches pages over pooled keep-alive HTTP, falling back to a browser.
+
+    With a `cache`, fresh cached pages are served without fetching. The
+    HTTP response is used unless it is the site's "Verifying your browser"
+    challenge or fails the caller's readiness check (by default: a table
+    with data, i.e. not rendered by JavaScript); then `browser_fetch(url)`
+    loads the page. Any other failure (a 404, a 5xx once retries run out,
+    a connection error) is recorded with the path 'failed' and gives None.
+    Pages that pass the readiness check are cached. The path each URL took
+    is kept in `records`. With
+    `save_dir`, every page is also written there under page_filename(url),
+    as fixtures for fixture_server.py.
+
+    Every request, over HTTP or in the browser, first takes a token from
+    `limiter`. Connection errors, 429 and 5xx responses, and browser loads
+    that fail are retried up to `retries` times with jittered exponential
+    backoff, waiting at least as long as a Retry-After header asks (a
+    request asked to wait over `max_retry_after` seconds isn't retried).
+    A 429 or 503 also slows the limiter down, and each 200 lets it speed
+    back up. Counts and waits accumulate in `stats` until start_run().
+    """
+
+    def __init__(self, browser_fetch: Callable[..., Optional[str]], pool_size=10,
+                 timeout=30, save_dir=None, cache: Optional[PageCache] = None,
+                 limiter: Optional[TokenBucket] = None, retries=2, max_retry_after=300):
+        self.browser_fetch = browser_fetch
+        self.timeout = timeout
+        self.save_dir = save_dir
+        self.cache = cache
+        self.limiter = limiter or TokenBucket(None)
+        self.retries = retries
+        self.max_retry_after = max_retry_after
+        self.stats = RunStats()
+        self.records: Dict[str, FetchRecord] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        self.pool_size = None
+        self.set_pool_size(pool_size)
+
+    def set_pool_size(self, pool_size):
+        """Keep up to pool_size connections per host, one per concurrent
+        caller; more callers would find the pool full and drop connections"""
+        if pool_size == self.pool_size:
+            return
+        previous = self.session.adapters.get('https://')
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if previous is not None:
+            previous.close()
+        self.pool_size = pool_size
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                setattr(self.stats, name, getattr(self.stats, name) + amount)
+
+    def _request(self, attempt, retry_after=None):
+        # Back off before a retry (at least as long as the site asked),
+        # then wait for the rate limit
+        if attempt:
+            delay = max(backoff_delay(attempt), retry_after or 0.0)
+            time.sleep(delay)
+            self._count(retries=1, backoff_wait=delay)
+        self._count(requests=1, rate_wait=self.limiter.acquire())
+
+    def _http(self, url, ready):
+        """Page source (or None), status, reason, whether to retry, and the
+        seconds the site asked to wait before retrying"""
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            return None, None, f"request failed: {e}", True, None
+        status = response.status_code
+        if status != 200:
+            retry = status == 429 or status >= 500
+            retry_after = None
+            if status in THROTTLE_STATUSES:
+                retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+                self.limiter.throttled(retry_after)
+                self._count(throttled=1)
+                if retry_after is not None and retry_after > self.max_retry_after:
+                    retry = False
+            return None, status, f"HTTP {status}", retry, retry_after
+        self.limiter.succeeded()
+        html = response.text
+        if CHALLENGE_MARKER in html:
+            return None, status, CHALLENGED, False, None
+        if not ready(html):
+            return None, status, NOT_RENDERED, False, None
+        return html, status, "ok", False, None
+
+    def fetch(self, url, ready: Callable[[str], bool] = has_table, **browser_options):
+        """Page source of url, or None when both paths fail"""
+        started = time.perf_counter()
+        if self.cache is not None:
+            html = self.cache.get(url)
+            if html is not None:
+                self._record(url, FetchRecord('cache', 'fresh', None,
+                                              time.perf_counter() - started))
+                return html
+
+        retry_after = None
+        for attempt in range(self.retries + 1):
+            self._request(attempt, retry_after)
+            html, status, reason, retry, retry_after = self._http(url, ready)
+            if not retry:
+                break
+        path = 'http'
+        if html is None and reason not in BROWSER_REASONS:
+            path = 'failed'
+            self.logger.warning(f"Could not fetch {url}: {reason}")
+        elif html is None:
+            self.logger.info(f"Falling back to the browser for {url}: {reason}")
+            path = 'browser'
+            for attempt in range(self.retries + 1):
+                self._request(attempt)
+                html = self.browser_fetch(url, **browser_options)
+                if html is not None:
+                    break
+
+        self._record(url, FetchRecord(path, reason, status, time.perf_counter() - started))
+        if html is not None and self.cache is not None and ready(html):
+            self.cache.put(url, html)
+        if html is not None and self.save_dir:
+            os.makedirs(self.save_dir, exist_ok=True)
+            with open(os.path.join(self.save_dir, page_filename(url)), 'w',
+                      encoding='utf-8') as f:
+                f.write(html)
+        return html
+
+    def _record(self, url, record):
+        with self._lock:
+            self.records[url] = record
+            self.stats.paths[record.path] = self.stats.paths.get(record.path, 0) + 1
+
+    def start_run(self):
+        """Start counting afresh, for one run's report"""
+        with self._lock:
+            self.stats = RunStats()
+            self.records = {}
+
+    def close(self):
+        self.session.close()
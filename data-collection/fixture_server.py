@@ -0,0 +1,73 @@
+"""Serve saved barttorvik pages over HTTP, as a stand-in for the site.
+
+Run from the data-collection directory:
+    python fixture_server.py data/pages [--port 8000]
+
+Pages are served under the URLs they were saved from (see
+fetch.page_filename); save them with BartTorvik(save_pages_dir=...).
+Point a scraper at the server to run it offline:
+    BartTorvik(base_url="http://127.0.0.1:8000")
+A saved "Verifying your browser" page, or one without its table, makes
+the scraper fall back to the browser for that URL.
+"""
+import argparse
+import os
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fetch import page_filename
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the site, so connection pooling is exercised
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, *args, directory, **kwargs):
+        self.directory = directory
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        path = os.path.join(self.directory, page_filename(self.path))
+        if not os.path.exists(path):
+            self.send_error(404, f"No fixture {os.path.basename(path)}")
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(directory, port=0):
+    """Start serving `directory` in a background thread; the server's
+    base URL is f"http://127.0.0.1:{server.server_port}". Stop it with
+    server.shutdown()"""
+    server = ThreadingHTTPServer(("127.0.0.1", port),
+                                 partial(FixtureHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port),
+                                 partial(FixtureHandler, directory=args.directory))
+    print(f"Serving {args.directory} at http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+
+def season_for(day: date) -> int:
+    """The season in progress (or last played) on a day; seasons are named
+    by the year they end in and start in November"""
+    return day.year + 1 if day.month >= 11 else day.year
+
+
+def season_end(season: int) -> float:
+    """Timestamp after which a season's data no longer changes: May 1 of
+    the year it ends in, after the tournament's final in early April"""
+    return datetime(season, 5, 1).timestamp()
+
+
+def season_of(url) -> Optional[int]:
+    """The season a barttorvik URL is for: its year parameter"""
+    years = parse_qs(urlsplit(url).query).get('year')
+    try:
+        return int(years[0]) if years else None
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True)
+class Freshness:
+    """Data of a past season saved after the season ended never changes;
+    everything else (the current season, a past season saved while it was
+    still being played, data of no particular season) is fresh for `ttl`
+    seconds"""
+    current_season: int
+    ttl: float
+
+    def is_fresh(self, season: Optional[int], saved_at: float) -> bool:
+        if (season is not None and season < self.current_season and
+                saved_at >= season_end(season)):
+            return True
+        return time.time() - saved_at < self.ttl
+
+
+def _write_atomic(path, data: bytes):
+    # Readers (and an interrupted run) never see a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+class PageCache:
+    """Fetched pages on disk, content-addressed and keyed by URL.
+
+    Each page is stored once under the SHA-256 of its content
+    (objects/ab/abcd....html); each URL has an entry (urls/<hash of
+    URL>.json) pointing at its content and recording when it was fetched.
+    """
+
+    def __init__(self, directory, freshness: Freshness):
+        self.directory = directory
+        self.freshness = freshness
+
+    def _entry_path(self, url):
+        return os.path.join(self.directory, 'urls',
+                            hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], digest + '.html')
+
+    def get(self, url) -> Optional[str]:
+        """The cached page for url, or None when missing or stale"""
+        try:
+            with open(self._entry_path(url), encoding='utf-8') as f:
+                entry = json.load(f)
+            if not self.freshness.is_fresh(entry['season'], entry['fetched_at']):
+                return None
+            with open(self._object_path(entry['sha256']), encoding='utf-8') as f:
+                return f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, url, html):
+        content = html.encode('utf-8')
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            _write_atomic(path, content)
+        entry = {'url': url, 'season': season_of(url), 'sha256': digest,
+                 'fetched_at': time.time()}
+        _write_atomic(self._entry_path(url), json.dumps(entry).encode('utf-8'))
+
+
+class Checkpoints:
+    """Parsed results of completed scrape jobs, saved as each job finishes.
+
+    manifest.json lists every saved (page type, year) with its file and
+    when it was saved; a later run reuses the ones still fresh and only
+    runs the rest, so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, directory, freshness: Freshness):
+        self.directory = directory
+        self.freshness = freshness
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self._lock = threading.Lock()
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.jobs = json.load(f)['jobs']
+        except (OSError, ValueError, KeyError):
+            self.jobs = {}
+
+    @staticmethod
+    def _key(year, page_type):
+        return f"{page_type}/{year}"
+
+    def load(self, year, page_type) -> Optional[pd.DataFrame]:
+        """The job's saved frame, or None when missing or stale"""
+        entry = self.jobs.get(self._key(year, page_type))
+        if entry is None or not self.freshness.is_fresh(year, entry['saved_at']):
+            return None
+        try:
+            # Cells were scraped as text; read them back as text
+            df = pd.read_csv(os.path.join(self.directory, entry['file']),
+                             dtype=str, keep_default_na=False)
+        except (OSError, ValueError):
+            return None
+        df['Year'] = year
+        return df
+
+    def save(self, year, page_type, df):
+        file = f"{page_type}_{year}.csv"
+        _write_atomic(os.path.join(self.directory, file),
+                      df.to_csv(index=False).encode('utf-8'))
+        with self._lock:
+            self.jobs[self._key(year, page_type)] = {
+                'file': file, 'rows': len(df), 'saved_at': time.time()}
+            manifest = json.dumps({'jobs': self.jobs}, indent=2, sort_keys=True)
+            _write_atomic(self.manifest_path, manifest.encode('utf-8'))
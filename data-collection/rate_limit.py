@@ -0,0 +1,116 @@
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """Rate limiter shared by every thread fetching from the site.
+
+    Allows `rate` requests per second on average and bursts of up to
+    `burst`. A caller that finds no token reserves the next one and sleeps
+    exactly until it is due, so waits are never longer than the rate
+    requires and callers are served in arrival order. A rate of None
+    doesn't limit.
+
+    The rate adapts to the site: throttled() (a 429 or 503) halves it, down
+    to `min_rate`, and can hold every caller back for a Retry-After; each
+    succeeded() request wins back `recovery` of the configured rate, until
+    it is reached again.
+    """
+
+    def __init__(self, rate: Optional[float], burst: int = 1,
+                 min_rate: Optional[float] = None, recovery: float = 0.05):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else (rate / 16 if rate else None)
+        self.recovery = recovery
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        # Tokens earned since the last update, at the rate in force then
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take a token, waiting for it if needed; returns the seconds waited"""
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def throttled(self, retry_after: Optional[float] = None):
+        """The site pushed back: halve the rate and, given the seconds of a
+        Retry-After, hand out no token before they have passed"""
+        if not self.rate:
+            return
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after:
+                # The next token is due retry_after seconds from now
+                self._tokens = min(self._tokens, 1 - retry_after * self.rate)
+
+    def succeeded(self):
+        """A request went through: recover part of the configured rate"""
+        if not self.rate or self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Seconds to wait before retry number `attempt` (from 1): exponential
+    backoff with full jitter, so concurrent retries spread out"""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Seconds a Retry-After header asks to wait: given as a number of
+    seconds or as an HTTP date; None when absent or unreadable"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        until = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = datetime.now(until.tzinfo) if until.tzinfo else datetime.now()
+    return max(0.0, (until - now).total_seconds())
+
+
+@dataclass
+class RunStats:
+    """What a scrape run fetched and how long it spent waiting"""
+    started: float = field(default_factory=time.monotonic)
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0
+    rate_wait: float = 0.0
+    backoff_wait: float = 0.0
+    paths: Dict[str, int] = field(default_factory=dict)
+
+    def report(self) -> str:
+        elapsed = time.monotonic() - self.started
+        pages = sum(self.paths.values())
+        return (f"{pages} pages in {elapsed:.1f}s ({pages / elapsed if elapsed else 0:.2f}/s), "
+                f"{self.requests} requests, {self.retries} retries, "
+                f"{self.throttled} throttled; "
+                f"workers waited {self.rate_wait:.1f}s in total for the rate limit and "
+                f"{self.backoff_wait:.1f}s backing off; pages per path: {self.paths}")
@@ -5,27 +5,86 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.chrome.service import Service as ChromeService
-from bs4 import BeautifulSoup
 import pandas as pd
-import time
 import os
-from datetime import datetime
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime
 from tqdm import tqdm
 import logging
 
+from fetch import CHALLENGE_MARKER, PageFetcher, has_table
+from page_cache import Checkpoints, Freshness, PageCache, season_for
+from rate_limit import TokenBucket
+from tables import parse_document, parse_headers, parse_rows, table_tag
+
+
+# Page types collected for every year, in the order results are assembled,
+# with the BartTorvik method fetching each
+PAGE_TYPES = {
+    'team_rankings': 'get_team_rankings',
+    'team_stats': 'get_team_stats',
+    'players': 'get_player_stats',
+}
+
+
+# Style of the players table, which the page may render with JavaScript
+PLAYER_TABLE_STYLE = 'white-space:nowrap;margin:auto;table-layout:fixed'
+
+
+def has_player_table(html):
+    return PLAYER_TABLE_STYLE in html
+
+
+@dataclass
+class JobFailure:
+    year: int
+    page_type: str
+    error: str
+
 
 class BartTorvik:
-    def __init__(self, delay=1.0, browser_path=None, headless=False):
-        self.base_url = "https://barttorvik.com"
+    def __init__(self, delay=1.0, browser_path=None, headless=False, max_workers=3,
+                 base_url="https://barttorvik.com", save_pages_dir=None,
+                 cache_dir=None, cache_ttl=6 * 3600, current_season=None, retries=2):
+        self.base_url = base_url
+        # Average seconds between requests to the site, over all workers;
+        # longer for a while after the site throttles us (429/503)
         self.delay = delay
         self.headless = headless
         self.browser_path = browser_path
-        self.driver = None
+        # Upper bound on pages (and browser sessions) fetched at the same time
+        self.max_workers = max_workers
+        self.failures = []
+
+        # Browser sessions are only started for pages plain HTTP can't get
+        # (see _browser_page_source); every one is kept in _drivers so
+        # close() can quit it
+        self._drivers = []
+        self._idle_drivers = queue.Queue()
+        self._drivers_lock = threading.Lock()
 
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
-        self._setup_driver()
+        # With a cache_dir, pages and finished jobs are kept on disk: past
+        # seasons for good once saved after they ended, others for
+        # cache_ttl seconds
+        self.freshness = Freshness(current_season or season_for(date.today()), cache_ttl)
+        page_cache = None
+        self.checkpoints = None
+        if cache_dir:
+            page_cache = PageCache(os.path.join(cache_dir, 'pages'), self.freshness)
+            self.checkpoints = Checkpoints(os.path.join(cache_dir, 'checkpoints'),
+                                           self.freshness)
+
+        self.fetcher = PageFetcher(self._browser_page_source, pool_size=max_workers,
+                                   save_dir=save_pages_dir, cache=page_cache,
+                                   limiter=TokenBucket(1 / delay if delay else None),
+                                   retries=retries)
+        self.last_run = None
 
     def _ensure_unique_columns(self, headers):
         unique_headers = []
@@ -48,7 +107,7 @@ class BartTorvik:
 
         return unique_headers
 
-    def _setup_driver(self):
+    def _new_driver(self):
         try:
             chrome_options = ChromeOptions()
 
@@ -77,128 +136,61 @@ class BartTorvik:
                         self.logger.info(f"Using Brave browser at: {path}")
                         break
 
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.driver.implicitly_wait(10)
+            # No implicit wait: page readiness is waited for explicitly, and
+            # an implicit wait would stall every find_elements poll
+            driver = webdriver.Chrome(options=chrome_options)
 
         except Exception as e:
             self.logger.error(f"Failed to setup driver: {e}")
             raise
 
-    def _get_page_source(self, url):
+        with self._drivers_lock:
+            self._drivers.append(driver)
+        return driver
+
+    def _checkout_driver(self):
+        # Sessions are started on demand, so there are never more than the
+        # number of jobs running at once
+        try:
+            return self._idle_drivers.get_nowait()
+        except queue.Empty:
+            return self._new_driver()
+
+    def _run_job(self, year, page_type):
+        """Fetch one page type for one year"""
+        return getattr(self, PAGE_TYPES[page_type])(year)
+
+    def _browser_page_source(self, url, wait_for='table td'):
+        """Load url in a browser session of its own, waiting out the
+        challenge and then until the `wait_for` CSS selector (the page's
+        table) matches"""
+        driver = None
         try:
-            self.driver.get(url)
+            driver = self._checkout_driver()
+            driver.get(url)
 
-            WebDriverWait(self.driver, 30).until(
-                lambda driver: "Verifying your browser" not in driver.page_source
+            WebDriverWait(driver, 30).until(
+                lambda driver: CHALLENGE_MARKER not in driver.page_source
             )
 
-            time.sleep(2)
+            WebDriverWait(driver, 20).until(
+                lambda driver: driver.find_elements(By.CSS_SELECTOR, wait_for)
+            )
 
-            return self.driver.page_source
+            return driver.page_source
 
         except Exception as e:
             self.logger.error(f"Failed to get page source for {url}: {e}")
             return None
 
-    def _is_visible(self, tag):
-        style = tag.get('style', '')
-        return 'display: none' not in style.lower()
-
-    def _parse_headers(self, table, filter_hidden=False):
-        headers = []
-        thead = table.find('thead')
-        if not thead:
-            return headers
-
-        header_rows = thead.find_all('tr')
-
-        if len(header_rows) == 1:
-            for th in header_rows[0].find_all(['th', 'td']):
-                if not filter_hidden or self._is_visible(th):
-                    headers.append(th.text.strip())
-        elif len(header_rows) == 2:
-            row1_expanded = []
-            row2_headers = []
-
-            for th in header_rows[0].find_all(['th', 'td']):
-                if not filter_hidden or self._is_visible(th):
-                    # Extract text before <br> if it exists (for team rankings toprow)
-                    if th.find('br'):
-                        text_before_br = ""
-                        for content in th.contents:
-                            if content.name == 'br':
-                                break
-                            if hasattr(content, 'strip'):
-                                text_before_br += content.strip()
-                            else:
-                                text_before_br += str(content).strip()
-                        text = text_before_br
-                    else:
-                        text = th.text.strip()
-
-                    colspan = int(th.get('colspan', 1))
-                    for _ in range(colspan):
-                        row1_expanded.append(text)
-
-            for th in header_rows[1].find_all(['th', 'td']):
-                if not filter_hidden or self._is_visible(th):
-                    row2_headers.append(th.text.strip())
-
-            max_len = max(len(row1_expanded), len(row2_headers))
-            row1_expanded.extend([''] * (max_len - len(row1_expanded)))
-            row2_headers.extend([''] * (max_len - len(row2_headers)))
-
-            for r1, r2 in zip(row1_expanded, row2_headers):
-                if r1 and r2:
-                    headers.append(f"{r1} - {r2}")
-                elif r1:
-                    headers.append(r1)
-                elif r2:
-                    headers.append(r2)
-                else:
-                    headers.append("")
-
-        return headers
-
-    def _parse_table_data(self, table, filter_hidden=False):
-        rows = []
-        tbody = table.find('tbody')
-
-        if not tbody:
-            tbody = table
-
-        for row in tbody.find_all('tr'):
-            cells = row.find_all(['td', 'th'])
-            if not cells:
-                continue
-
-            row_data = []
-            for cell in cells:
-                if not filter_hidden or self._is_visible(cell):
-                    link = cell.find('a')
-                    if link:
-                        cell_text = link.text.strip()
-                    else:
-                        br_tag = cell.find('br')
-                        if br_tag:
-                            text_before_br = ""
-                            for content in cell.contents:
-                                if content.name == 'br':
-                                    break
-                                if hasattr(content, 'strip'):
-                                    text_before_br += content.strip()
-                                else:
-                                    text_before_br += str(content).strip()
-                            cell_text = text_before_br
-                        else:
-                            cell_text = cell.get_text(strip=True)
-
-                    row_data.append(cell_text)
-
-            if row_data and any(cell.strip() for cell in row_data):
-                rows.append(row_data)
-
-        return rows
+        finally:
+            if driver is not None:
+                self._idle_drivers.put(driver)
+
+    def _get_page_source(self, url, ready=has_table, **browser_options):
+        # Plain HTTP first; the browser only for challenges and pages whose
+        # table isn't in the served HTML
+        return self.fetcher.fetch(url, ready, **browser_options)
 
     def _create_dataframe(self, headers, rows, year):
         if not rows:
@@ -214,17 +206,9 @@ class BartTorvik:
 
         headers = self._ensure_unique_columns(headers)
 
-        normalized_rows = []
-        for row in rows:
-            if len(row) > max_cols:
-                normalized_rows.append(row[:max_cols])
-            elif len(row) < max_cols:
-                padded_row = row + [''] * (max_cols - len(row))
-                normalized_rows.append(padded_row)
-            else:
-                normalized_rows.append(row)
-
-        df = pd.DataFrame(normalized_rows, columns=headers)
+        # Built column by column, short rows padded with ''
+        columns = zip(*(row + [''] * (max_cols - len(row)) for row in rows))
+        df = pd.DataFrame(dict(zip(headers, map(list, columns))))
         df['Year'] = year
         return df
 
@@ -235,15 +219,13 @@ class BartTorvik:
         if not page_source:
             return None
 
-        soup = BeautifulSoup(page_source, 'html.parser')
-
-        table = soup.find('table')
-        if not table:
+        table = parse_document(page_source).find('.//table')
+        if table is None:
             self.logger.error(f"Could not find rankings table for year {year}")
             return None
 
-        headers = self._parse_headers(table)
-        rows = self._parse_table_data(table)
+        headers = parse_headers(table)
+        rows = parse_rows(table)
 
         self.logger.info(
             f"Team rankings {year}: Found {len(headers)} headers: {headers[:5]}...")
@@ -254,11 +236,7 @@ class BartTorvik:
             self.logger.info(
                 f"Team rankings {year}: Last row: {rows[-1][:5]}...")
 
-        df = self._create_dataframe(headers, rows, year)
-        if df is not None:
-            time.sleep(self.delay)
-
-        return df
+        return self._create_dataframe(headers, rows, year)
 
     def get_team_stats(self, year=2025):
         url = f"{self.base_url}/teamstats.php?year={year}"
@@ -267,118 +245,126 @@ class BartTorvik:
         if not page_source:
             return None
 
-        soup = BeautifulSoup(page_source, 'html.parser')
-
-        table = soup.find('table')
-        if not table:
+        table = parse_document(page_source).find('.//table')
+        if table is None:
             self.logger.error(
                 f"Could not find team stats table for year {year}")
             return None
 
-        headers = self._parse_headers(table)
-        rows = self._parse_table_data(table)
+        headers = parse_headers(table)
+        rows = parse_rows(table)
 
-        df = self._create_dataframe(headers, rows, year)
-        if df is not None:
-            time.sleep(self.delay)
-
-        return df
+        return self._create_dataframe(headers, rows, year)
 
     def get_player_stats(self, year=2025):
         url = f"{self.base_url}/playerstat.php?link=y&year={year}"
 
-        try:
-            self.driver.get(url)
-
-            WebDriverWait(self.driver, 30).until(
-                lambda driver: "Verifying your browser" not in driver.page_source
-            )
-
-            WebDriverWait(self.driver, 20).until(
-                lambda driver: driver.find_elements(
-                    By.CSS_SELECTOR, 'table[style*="white-space:nowrap;margin:auto;table-layout:fixed"]')
-            )
-
-            time.sleep(3)
-
-            page_source = self.driver.page_source
+        page_source = self._get_page_source(
+            url, ready=has_player_table,
+            wait_for=f'table[style*="{PLAYER_TABLE_STYLE}"] td')
 
-        except Exception as e:
+        if not page_source:
             self.logger.error(
-                f"Failed to load player stats page for year {year}: {e}")
+                f"Failed to load player stats page for year {year}")
             return None
 
-        soup = BeautifulSoup(page_source, 'html.parser')
-
-        tables = soup.find_all('table')
+        tables = list(parse_document(page_source).iter('table'))
         table = None
 
         self.logger.info(
             f"Found {len(tables)} tables for player stats year {year}")
 
         for i, tbl in enumerate(tables):
-            tbl_str = str(tbl)
-            self.logger.info(f"Table {i+1}: {tbl_str[:200]}...")
-
-            table_tag = tbl_str.split('>')[0] + '>'
-
-            if ('white-space:nowrap' in table_tag and
-                'margin:auto' in table_tag and
-                'table-layout:fixed' in table_tag and
-                'display:none' not in table_tag and
-                    'display: none' not in table_tag):
+            tag = table_tag(tbl)
+            self.logger.info(f"Table {i+1}: {tag[:200]}")
+
+            if ('white-space:nowrap' in tag and
+                'margin:auto' in tag and
+                'table-layout:fixed' in tag and
+                'display:none' not in tag and
+                    'display: none' not in tag):
                 table = tbl
                 self.logger.info(f"Selected table {i+1} for player stats")
                 break
 
-        if not table and tables:
+        if table is None and tables:
             self.logger.warning(
                 f"Could not find table with expected style, using first available table")
             table = tables[0]
 
-        if not table:
+        if table is None:
             self.logger.error(
                 f"Could not find any suitable players table for year {year}")
             return None
 
-        headers = self._parse_headers(table, filter_hidden=True)
-        rows = self._parse_table_data(table, filter_hidden=True)
-
-        df = self._create_dataframe(headers, rows, year)
-        if df is not None:
-            time.sleep(self.delay)
-
-        return df
-
-    def collect_historical_data(self, start_year=2019, end_year=2025):
-        all_team_rankings = []
-        all_team_stats = []
-        all_player_data = []
-
-        for year in tqdm(range(start_year, end_year + 1), desc="Collecting data"):
-            self.logger.info(f"Collecting data for year {year}")
-
-            team_rankings = self.get_team_rankings(year)
-            if team_rankings is not None:
-                all_team_rankings.append(team_rankings)
-
-            team_stats = self.get_team_stats(year)
-            if team_stats is not None:
-                all_team_stats.append(team_stats)
-
-            player_data = self.get_player_stats(year)
-            if player_data is not None:
-                all_player_data.append(player_data)
-
-            time.sleep(2)
-
-        team_rankings_df = pd.concat(
-            all_team_rankings, ignore_index=True) if all_team_rankings else pd.DataFrame()
-        team_stats_df = pd.concat(
-            all_team_stats, ignore_index=True) if all_team_stats else pd.DataFrame()
-        players_df = pd.concat(
-            all_player_data, ignore_index=True) if all_player_data else pd.DataFrame()
-
+        headers = parse_headers(table, filter_hidden=True)
+        rows = parse_rows(table, filter_hidden=True)
+
+        return self._create_dataframe(headers, rows, year)
+
+    def collect_historical_data(self, start_year=2019, end_year=2025, max_workers=None):
+        """Fetch every page type for every year, up to `max_workers` pages
+        at a time (default: the scraper's max_workers), each in its own
+        browser session.
+
+        Jobs finish in any order; each page type's frames are concatenated
+        by year. Jobs that fail or find no data are logged and listed in
+        self.failures. With a cache_dir, every finished job is checkpointed,
+        and jobs with a fresh checkpoint aren't run again.
+        """
+        max_workers = max_workers or self.max_workers
+        # One pooled connection per worker, like the browser sessions
+        self.fetcher.set_pool_size(max_workers)
+        jobs = [(year, page_type)
+                for year in range(start_year, end_year + 1) for page_type in PAGE_TYPES]
+        results = {}
+        self.failures = []
+        self.fetcher.start_run()
+
+        if self.checkpoints is not None:
+            for year, page_type in jobs:
+                df = self.checkpoints.load(year, page_type)
+                if df is not None:
+                    results[(year, page_type)] = df
+            self.logger.info(
+                f"{len(results)} of {len(jobs)} jobs restored from checkpoints")
+        pending = [job for job in jobs if job not in results]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._run_job, year, page_type): (year, page_type)
+                       for year, page_type in pending}
+            for future in tqdm(as_completed(futures), total=len(futures),
+                               desc="Collecting data"):
+                year, page_type = futures[future]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    self.failures.append(JobFailure(year, page_type, str(e)))
+                    self.logger.error(f"{page_type} {year} failed: {e}")
+                    continue
+                if df is None:
+                    self.failures.append(JobFailure(year, page_type, "no data"))
+                    self.logger.error(f"{page_type} {year}: no data")
+                else:
+                    results[(year, page_type)] = df
+                    if self.checkpoints is not None:
+                        self.checkpoints.save(year, page_type, df)
+
+        self.failures.sort(key=lambda failure: (
+            failure.year, list(PAGE_TYPES).index(failure.page_type)))
+        if self.failures:
+            self.logger.warning(f"{len(self.failures)} of {len(jobs)} jobs failed")
+        self.last_run = self.fetcher.stats.report()
+        self.logger.info(f"Run: {self.last_run}")
+
+        frames = []
+        for page_type in PAGE_TYPES:
+            collected = [results[(year, page)] for year, page in jobs
+                         if page == page_type and (year, page) in results]
+            frames.append(pd.concat(collected, ignore_index=True)
+                          if collected else pd.DataFrame())
+
+        team_rankings_df, team_stats_df, players_df = frames
         return team_rankings_df, team_stats_df, players_df
 
     def save_data(self, team_rankings_df, team_stats_df, players_df, data_dir="data/raw"):
@@ -402,8 +388,11 @@ class BartTorvik:
         return team_rankings_file, team_stats_file, players_file
 
     def close(self):
-        if self.driver:
-            self.driver.quit()
+        self.fetcher.close()
+        with self._drivers_lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            driver.quit()
 
     def __enter__(self):
         return self
@@ -413,7 +402,8 @@ class BartTorvik:
 
 
 if __name__ == "__main__":
-    with BartTorvik(delay=1.0, headless=False) as scraper:
+    with BartTorvik(delay=1.0, headless=False, max_workers=3,
+                    cache_dir="data/cache") as scraper:
         print("Testing data collection from barttorvik.com...")
 
         team_rankings_df, team_stats_df, players_df = scraper.collect_historical_data(
@@ -422,6 +412,9 @@ if __name__ == "__main__":
         print(f"Collected {len(team_rankings_df)} team ranking records")
         print(f"Collected {len(team_stats_df)} team stats records")
         print(f"Collected {len(players_df)} player records")
+        for failure in scraper.failures:
+            print(f"Failed: {failure.page_type} {failure.year}: {failure.error}")
+        print(f"Run: {scraper.last_run}")
 
         team_rankings_file, team_stats_file, players_file = scraper.save_data(
             team_rankings_df, team_stats_df, players_df)
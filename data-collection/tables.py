@@ -0,0 +1,142 @@
+"""Table extraction from barttorvik pages with lxml.
+
+Text is read as BeautifulSoup reads it: script, style and template
+contents and comments don't count as text, except that comments before
+a cell's <br> do.
+"""
+import lxml.html
+
+# Elements whose contents aren't text of the page
+NON_TEXT_ELEMENTS = ('script', 'style', 'template')
+
+
+def parse_document(html):
+    """Parse a page, dropping the contents of script, style and template
+    elements (their tails are page text and stay)"""
+    document = lxml.html.document_fromstring(html)
+    for element in list(document.iter(*NON_TEXT_ELEMENTS)):
+        element.text = None
+        for child in list(element):
+            element.remove(child)
+    return document
+
+
+def table_tag(table):
+    """Opening tag of a table, e.g. '<table style="...">'"""
+    attributes = ''.join(f' {name}="{value}"' for name, value in table.items())
+    return f'<table{attributes}>'
+
+
+def is_visible(element):
+    style = element.get('style', '')
+    return 'display: none' not in style.lower()
+
+
+def _text(element):
+    # All text of the element and its descendants, without its tail
+    if len(element) == 0:
+        return element.text or ''
+    return ''.join(element.itertext())
+
+
+def _stripped_text(element):
+    # Each piece of text stripped, then joined
+    if len(element) == 0:
+        return (element.text or '').strip()
+    return ''.join(piece.strip() for piece in element.itertext())
+
+
+def _text_before_br(element):
+    # Text of the direct children up to the first <br> child
+    pieces = [(element.text or '').strip()]
+    for child in element:
+        if child.tag == 'br':
+            break
+        if isinstance(child.tag, str):
+            pieces.append(_text(child).strip())
+        else:
+            # A comment, whose text BeautifulSoup counts here
+            pieces.append((child.text or '').strip())
+        pieces.append((child.tail or '').strip())
+    return ''.join(pieces)
+
+
+def parse_headers(table, filter_hidden=False):
+    """Column names from the table's <thead>.
+
+    With two header rows, the first row's cells (their text before any
+    <br>) are repeated over their colspan and combined with the second
+    row's as "top - bottom".
+    """
+    headers = []
+    thead = table.find('.//thead')
+    if thead is None:
+        return headers
+
+    header_rows = list(thead.iter('tr'))
+
+    if len(header_rows) == 1:
+        for th in header_rows[0].iter('th', 'td'):
+            if not filter_hidden or is_visible(th):
+                headers.append(_text(th).strip())
+    elif len(header_rows) == 2:
+        row1_expanded = []
+        row2_headers = []
+
+        for th in header_rows[0].iter('th', 'td'):
+            if not filter_hidden or is_visible(th):
+                if th.find('.//br') is not None:
+                    text = _text_before_br(th)
+                else:
+                    text = _text(th).strip()
+                row1_expanded.extend([text] * int(th.get('colspan', 1)))
+
+        for th in header_rows[1].iter('th', 'td'):
+            if not filter_hidden or is_visible(th):
+                row2_headers.append(_text(th).strip())
+
+        max_len = max(len(row1_expanded), len(row2_headers))
+        row1_expanded.extend([''] * (max_len - len(row1_expanded)))
+        row2_headers.extend([''] * (max_len - len(row2_headers)))
+
+        for r1, r2 in zip(row1_expanded, row2_headers):
+            if r1 and r2:
+                headers.append(f"{r1} - {r2}")
+            else:
+                headers.append(r1 or r2)
+
+    return headers
+
+
+def parse_rows(table, filter_hidden=False):
+    """Cell texts of every row of the table's <tbody> (or of the whole
+    table without one), skipping blank rows.
+
+    A cell's text is its first link's text, else its text before any <br>,
+    else all its text.
+    """
+    rows = []
+    tbody = table.find('.//tbody')
+    if tbody is None:
+        tbody = table
+
+    for row in tbody.iter('tr'):
+        row_data = []
+        for cell in row.iter('td', 'th'):
+            if filter_hidden and not is_visible(cell):
+                continue
+            if len(cell) == 0:
+                row_data.append((cell.text or '').strip())
+                continue
+            link = cell.find('.//a')
+            if link is not None:
+                row_data.append(_text(link).strip())
+            elif cell.find('.//br') is not None:
+                row_data.append(_text_before_br(cell))
+            else:
+                row_data.append(_stripped_text(cell))
+
+        if any(text.strip() for text in row_data):
+            rows.append(row_data)
+
+    return rows
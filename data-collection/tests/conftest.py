@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+DATA_COLLECTION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+# Pages as the site serves them over plain HTTP
+PAGES_DIR = os.path.join(FIXTURES_DIR, 'pages')
+# Pages as a browser renders them, for URLs the HTTP pages can't serve
+BROWSER_DIR = os.path.join(FIXTURES_DIR, 'browser')
+
+sys.path.insert(0, DATA_COLLECTION_DIR)
+
+from fetch import page_filename  # noqa: E402
+from fixture_server import serve_fixtures  # noqa: E402
+
+
+@pytest.fixture
+def site():
+    """Base URL of a local server standing in for the site"""
+    server = serve_fixtures(PAGES_DIR)
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class StubBrowser:
+    """browser_fetch that returns the rendered fixture page for a URL and
+    remembers every URL it was asked for"""
+
+    def __init__(self):
+        self.urls = []
+
+    def __call__(self, url, **options):
+        self.urls.append(url)
+        path = os.path.join(BROWSER_DIR, page_filename(url))
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+
+@pytest.fixture
+def browser():
+    return StubBrowser()
@@ -0,0 +1,73 @@
+from fetch import CHALLENGED, NOT_RENDERED, PageFetcher, has_table
+from scraper import BartTorvik, has_player_table
+
+
+def make_fetcher(browser):
+    return PageFetcher(browser, pool_size=2, retries=0)
+
+
+def test_rendered_page_is_used_over_http(site, browser):
+    fetcher = make_fetcher(browser)
+    html = fetcher.fetch(f"{site}/trank.php?year=2024")
+
+    assert 'Connecticut' in html
+    assert browser.urls == []
+    record = fetcher.records[f"{site}/trank.php?year=2024"]
+    assert (record.path, record.reason, record.status) == ('http', 'ok', 200)
+
+
+def test_challenge_falls_back_to_the_browser(site, browser):
+    fetcher = make_fetcher(browser)
+    url = f"{site}/teamstats.php?year=2024"
+    html = fetcher.fetch(url)
+
+    assert has_table(html) and 'Verifying your browser' not in html
+    assert browser.urls == [url]
+    record = fetcher.records[url]
+    assert (record.path, record.reason, record.status) == ('browser', CHALLENGED, 200)
+
+
+def test_unrendered_table_falls_back_to_the_browser(site, browser):
+    fetcher = make_fetcher(browser)
+    url = f"{site}/playerstat.php?link=y&year=2024"
+    html = fetcher.fetch(url, ready=has_player_table)
+
+    assert has_player_table(html)
+    assert browser.urls == [url]
+    record = fetcher.records[url]
+    assert (record.path, record.reason, record.status) == ('browser', NOT_RENDERED, 200)
+
+
+def test_http_error_is_recorded_without_the_browser(site, browser):
+    fetcher = make_fetcher(browser)
+    url = f"{site}/trank.php?year=1999"
+
+    assert fetcher.fetch(url) is None
+    assert browser.urls == []
+    record = fetcher.records[url]
+    assert (record.path, record.reason, record.status) == ('failed', 'HTTP 404', 404)
+
+
+def test_scraper_collects_every_page_type(site, browser):
+    scraper = BartTorvik(base_url=site, delay=0, max_workers=2, retries=0)
+    scraper.fetcher.browser_fetch = browser
+    try:
+        team_rankings_df, team_stats_df, players_df = scraper.collect_historical_data(2024, 2024)
+    finally:
+        scraper.close()
+
+    assert scraper.failures == []
+    assert len(team_rankings_df) == 4 and 'Houston' in team_rankings_df.iloc[1].tolist()
+    assert len(team_stats_df) == 3 and 'Eff. FG%' in team_stats_df.columns
+    assert len(players_df) == 3 and 'Pid' not in players_df.columns
+    assert players_df['Year'].tolist() == [2024] * 3
+
+    paths = {url.split('/')[-1]: (record.path, record.reason)
+             for url, record in scraper.fetcher.records.items()}
+    assert paths == {
+        'trank.php?year=2024': ('http', 'ok'),
+        'teamstats.php?year=2024': ('browser', CHALLENGED),
+        'playerstat.php?link=y&year=2024': ('browser', NOT_RENDERED),
+    }
+    assert sorted(url.split('/')[-1] for url in browser.urls) == [
+        'playerstat.php?link=y&year=2024', 'teamstats.php?year=2024']
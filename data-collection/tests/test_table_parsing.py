@@ -0,0 +1,39 @@
+"""The lxml table parser against the BeautifulSoup one it replaced, over
+every fixture page and the benchmark's synthetic pages.
+
+Pages saved from the site with BartTorvik(save_pages_dir=...) and copied
+into tests/fixtures/saved/ are checked too.
+"""
+import glob
+import os
+
+import pytest
+
+from benchmarks.table_parsing import page_differences, synthetic_pages
+from scraper import BartTorvik
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def fixture_pages():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '**', '*.html'), recursive=True)):
+        with open(path, encoding='utf-8') as f:
+            pages[os.path.relpath(path, FIXTURES_DIR)] = f.read()
+    pages.update(synthetic_pages())
+    return pages
+
+
+PAGES = fixture_pages()
+
+
+@pytest.fixture(scope='module')
+def scraper():
+    scraper = BartTorvik(delay=0)
+    yield scraper
+    scraper.close()
+
+
+@pytest.mark.parametrize('name', PAGES)
+def test_lxml_matches_reference_parser(scraper, name):
+    assert page_differences(scraper, PAGES[name]) == []